@@ -0,0 +1,205 @@
+import base64
+import json
+from datetime import datetime, timedelta
+import dateutil.parser
+import pytz
+from flask import Blueprint, Response, abort, current_app, request
+from models import db, Venue, Artist, Show
+from bookings import venue_availability
+from queries import (
+    SHOW_LISTING_COLUMNS, encode_show_cursor, shows_listing_query,
+    load_venue_detail, load_artist_detail
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+# ---------------------------------------------------------------------------- #
+# Serialization.
+# ---------------------------------------------------------------------------- #
+
+VENUE_API_FIELDS = (
+    'id', 'name', 'genres', 'address', 'city', 'state', 'phone', 'website',
+    'facebook_link', 'image_link', 'seeking_talent', 'seeking_description',
+    'num_upcoming_shows', 'num_past_shows', 'updated_at'
+)
+
+ARTIST_API_FIELDS = (
+    'id', 'name', 'genres', 'city', 'state', 'phone', 'website',
+    'facebook_link', 'image_link', 'seeking_venue', 'seeking_description',
+    'upcoming_shows_count', 'past_shows_count', 'updated_at'
+)
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(repr(value))
+
+
+def json_response(data, status=200):
+    if orjson is not None:
+        body = orjson.dumps(data)
+    else:
+        body = json.dumps(data, default=json_default, separators=(',', ':'))
+    return Response(body, status=status, mimetype='application/json')
+
+
+def requested_fields(allowed):
+    # sparse fieldsets: ?fields=id,name
+    fields = request.args.get('fields')
+    if not fields:
+        return list(allowed)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        abort(400, 'Unknown fields: {}'.format(', '.join(unknown)))
+    return fields
+
+
+def page_size():
+    limit = request.args.get('limit', current_app.config['API_PAGE_SIZE'], type=int)
+    return min(max(limit, 1), current_app.config['API_MAX_PAGE_SIZE'])
+
+
+def encode_id_cursor(entity_id):
+    return base64.urlsafe_b64encode(str(entity_id).encode()).decode()
+
+
+def decode_id_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        abort(400, 'Invalid cursor')
+
+
+# ---------------------------------------------------------------------------- #
+# Endpoints.
+# ---------------------------------------------------------------------------- #
+
+
+def list_catalog(model, allowed):
+    """Id-ordered page of venues or artists, built from column tuples.
+
+    Supports ?fields=, ?limit=, ?cursor= and the filters ?city=, ?state= and
+    ?genre= (repeatable, all must match).
+    """
+    fields = requested_fields(allowed)
+    limit = page_size()
+    # the cursor needs the id even when the client did not ask for it
+    columns = fields if 'id' in fields else fields + ['id']
+    query = db.session.query(*[getattr(model, field) for field in columns])
+
+    if request.args.get('city'):
+        query = query.filter(model.city == request.args['city'])
+    if request.args.get('state'):
+        query = query.filter(model.state == request.args['state'])
+    genres = request.args.getlist('genre')
+    if genres:
+        query = query.filter(model.genres.contains(genres))
+    if request.args.get('cursor'):
+        query = query.filter(model.id > decode_id_cursor(request.args['cursor']))
+
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_id_cursor(rows[-1].id)
+    data = [dict(zip(fields, row)) for row in rows]
+    return json_response({'data': data, 'next_cursor': next_cursor})
+
+
+@api.route('/venues')
+def list_venues():
+    return list_catalog(Venue, VENUE_API_FIELDS)
+
+
+@api.route('/artists')
+def list_artists():
+    return list_catalog(Artist, ARTIST_API_FIELDS)
+
+
+@api.route('/venues/<int:venue_id>')
+def get_venue(venue_id):
+    return json_response({'data': load_venue_detail(venue_id)})
+
+
+@api.route('/artists/<int:artist_id>')
+def get_artist(artist_id):
+    return json_response({'data': load_artist_detail(artist_id)})
+
+
+@api.route('/shows')
+def list_shows():
+    """Shows in (start_time, id) order with ?fields=, ?limit=, ?cursor= and
+    ?venue_id= / ?artist_id= filters."""
+    fields = requested_fields(SHOW_LISTING_COLUMNS)
+    limit = page_size()
+    columns = list(dict.fromkeys(fields + ['id', 'start_time']))
+    query = shows_listing_query(request.args.get('cursor'), fields=columns)
+    if request.args.get('venue_id', type=int):
+        query = query.filter(Show.venue_id == request.args.get('venue_id', type=int))
+    if request.args.get('artist_id', type=int):
+        query = query.filter(Show.artist_id == request.args.get('artist_id', type=int))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_show_cursor(rows[-1].start_time, rows[-1].id)
+    data = [{field: getattr(row, field) for field in fields} for row in rows]
+    return json_response({'data': data, 'next_cursor': next_cursor})
+
+
+@api.route('/shows/<int:show_id>')
+def get_show(show_id):
+    row = shows_listing_query().filter(Show.id == show_id).first()
+    if row is None:
+        abort(404)
+    return json_response({'data': row._asdict()})
+
+
+def window_bound(name):
+    value = request.args.get(name)
+    if not value:
+        abort(400, 'Missing ?{}='.format(name))
+    try:
+        moment = dateutil.parser.parse(value)
+    except (ValueError, OverflowError):
+        abort(400, 'Invalid ?{}='.format(name))
+    return moment if moment.tzinfo else moment.replace(tzinfo=pytz.UTC)
+
+
+@api.route('/venues/<int:venue_id>/availability')
+def get_venue_availability(venue_id):
+    """Busy and free intervals of a venue between ?start= and ?end=, with
+    ?min_minutes= dropping free gaps too short to book."""
+    start, end = window_bound('start'), window_bound('end')
+    if end <= start:
+        abort(400, 'end must be after start')
+    if end - start > timedelta(days=current_app.config['AVAILABILITY_MAX_DAYS']):
+        abort(400, 'Window longer than {} days'.format(current_app.config['AVAILABILITY_MAX_DAYS']))
+    if db.session.query(Venue.id).filter(Venue.id == venue_id).first() is None:
+        abort(404)
+
+    min_minutes = request.args.get('min_minutes', type=int)
+    busy, free = venue_availability(
+        venue_id, start, end,
+        min_duration=timedelta(minutes=min_minutes) if min_minutes else None)
+    return json_response({'data': {
+        'venue_id': venue_id,
+        'start': start,
+        'end': end,
+        'busy': [{'start': busy_start, 'end': busy_end} for busy_start, busy_end in busy],
+        'free': [{'start': free_start, 'end': free_end} for free_start, free_end in free],
+    }})
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return json_response({'error': error.description}, status=error.code)
@@ -2,215 +2,331 @@
 # Imports
 # ---------------------------------------------------------------------------- #
 
+import io
 import json
+from itertools import groupby
+import click
 import dateutil.parser
-from datetime import datetime
 import pytz
-import babel
-from config import SQLALCHEMY_DATABASE_URI
 from flask import (
-    Flask,
+    Flask, Blueprint,
+    current_app,
     render_template,
     request, Response,
     flash, redirect,
-    url_for
+    url_for, stream_with_context,
+    jsonify, abort
 )
-from models import db, Venue, Artist, Show
+from models import db, Venue, Artist, Show, Area
 from flask_migrate import Migrate  # import to run flask db <command>
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func
 import logging
 from logging import Formatter, FileHandler
-from flask_wtf import Form
-from forms import *
-from defaultData import artists_default_data, shows_default_data, venues_default_data
+from filters import format_datetime
+from export import export_catalog, EXPORT_BATCH_SIZE
+from importer import import_catalog, read_rows, IMPORT_BATCH_SIZE
+from seed import seed, SEED_BATCH_SIZE
+from api import api
+from pool import engine_options, all_pool_stats
+from routing import replica_binds, pin_to_primary
+from metrics import metrics
+from assets import assets, build_assets
+from compression import compression
+from cache import cache, invalidate_venue, invalidate_artist, invalidate_show
+from http_cache import (
+    conditional, venues_stamp, venue_stamp, artists_stamp, artist_stamp, shows_stamp
+)
+from counters import rollover_shows
+from areas import city_key
+from bookings import is_booking_conflict
+from search import search, autocomplete, requested_genres, genre_filter, genre_facets
+from queries import load_venue_detail, load_artist_detail, load_shows_page, stream_shows
 
 # ---------------------------------------------------------------------------- #
 # App Config.
 # ---------------------------------------------------------------------------- #
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-
-# connect to a local postgresql database
-app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
-
-db.create_all()
+bp = Blueprint('main', __name__, cli_group=None)
+moment = Moment()
+migrate = Migrate()
+
+
+def create_app(config_object='config'):
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    if not app.config.get('SECRET_KEY'):
+        # a per-process key would break sessions across workers and restarts
+        raise RuntimeError('SECRET_KEY must be set when DEBUG is off')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(app.config)
+
+    # the one SQLAlchemy instance, shared with models.py
+    db.init_app(app)
+    migrate.init_app(app, db)
+    moment.init_app(app)
+    cache.init_app(app)
+    metrics.init_app(app)
+    assets.init_app(app)
+    compression.init_app(app)
+    app.after_request(pin_to_primary)
+    app.jinja_env.filters['datetime'] = format_datetime
+    app.register_blueprint(bp)
+    app.register_blueprint(api)
+
+    if not app.debug:
+        # delay opening the log until the first record is written
+        file_handler = FileHandler('error.log', delay=True)
+        file_handler.setFormatter(
+            Formatter(
+                '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+        )
+        app.logger.setLevel(logging.INFO)
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
+
+    return app
 
 # ---------------------------------------------------------------------------- #
-# Load default data.
+# Globals
 # ---------------------------------------------------------------------------- #
 
-
-def addVenueData():
-    venues = Venue.query.all()
-    # only load data if db is empty
-    if (not len(venues)):
-        for defaultVenue in venues_default_data:
-            venue = Venue()
-            venue.address = defaultVenue['address']
-            venue.city = defaultVenue['city']
-            venue.facebook_link = defaultVenue['facebook_link']
-            venue.genres = defaultVenue['genres']
-            venue.image_link = defaultVenue['image_link']
-            venue.name = defaultVenue['name']
-            venue.phone = defaultVenue['phone']
-            venue.seeking_description = defaultVenue['seeking_description']
-            venue.seeking_talent = defaultVenue['seeking_talent']
-            venue.state = defaultVenue['state']
-            venue.website = defaultVenue['website']
-            db.session.add(venue)
-        db.session.commit()
-
-
-def addArtistData():
-    artists = Artist.query.all()
-    # only load data if db is empty
-    if (not len(artists)):
-        for defaultArtist in artists_default_data:
-            artist = Artist()
-            artist.city = defaultArtist['city']
-            artist.facebook_link = defaultArtist['facebook_link']
-            artist.genres = defaultArtist['genres']
-            artist.image_link = defaultArtist['image_link']
-            artist.name = defaultArtist['name']
-            artist.phone = defaultArtist['phone']
-            artist.seeking_description = defaultArtist['seeking_description']
-            artist.seeking_venue = defaultArtist['seeking_venue']
-            artist.state = defaultArtist['state']
-            artist.website = defaultArtist['website']
-            db.session.add(artist)
-        db.session.commit()
-
-
-def addShowsData():
-    shows = Show.query.all()
-    # only load data if db is empty
-    if (not len(shows)):
-        for defaultShow in shows_default_data:
-            show = Show()
-            show.venue_id = defaultShow['venue_id']
-            show.artist_id = defaultShow['artist_id']
-            show.start_time = defaultShow['start_time']
-            db.session.add(show)
-        db.session.commit()
+utc = pytz.UTC
 
 
-# ---------------------------------------------------------------------------- #
-# Globals
-# ---------------------------------------------------------------------------- #
+def parse_start_time(value):
+    # naive form input is treated as UTC
+    start_time = dateutil.parser.parse(value)
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=utc)
+    return start_time
 
-utc = pytz.UTC
+def stream_template(template_name, **context):
+    # like render_template, but yields the page in chunks as the context is consumed
+    current_app.update_template_context(context)
+    stream = current_app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(20)
+    return stream
 
 # ---------------------------------------------------------------------------- #
-# filters.
+# Commands.
 # ---------------------------------------------------------------------------- #
 
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format)
+@bp.cli.command('seed')
+@click.argument('path', required=False)
+@click.option('--batch-size', default=SEED_BATCH_SIZE, show_default=True,
+              help='Rows per multi-row INSERT.')
+def seed_command(path, batch_size):
+    """Bulk-load defaultData.py, or a JSON/JSONL file, into empty tables."""
+    seed(path, batch_size=batch_size, log=click.echo)
+
+
+@bp.cli.command('rollover-shows')
+def rollover_shows_command():
+    """Move shows that have started from upcoming to past counters.
+
+    Meant to run from cron, e.g. every five minutes.
+    """
+    rolled_over, owners = rollover_shows()
+    # listing pages show upcoming counts, detail pages list upcoming shows;
+    # after a full recount the detail pages' ETags alone move them on
+    cache.invalidate('venues', 'artists', *[
+        '{}:{}'.format(kind, owner_id) for kind, ids in (owners or {}).items() for owner_id in ids])
+    if rolled_over is None:
+        click.echo('Recounted all show counters')
+    else:
+        click.echo('Rolled over {} shows'.format(rolled_over))
+
+
+@bp.cli.command('import-catalog')
+@click.argument('kind', type=click.Choice(['venue', 'artist', 'show']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'format', type=click.Choice(['csv', 'jsonl']),
+              help='Defaults to the file extension.')
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True)
+@click.option('--method', type=click.Choice(['copy', 'insert']),
+              help='Defaults to COPY when the driver supports it.')
+@click.option('--rejects', type=click.Path(dir_okay=False),
+              help='Write rejected rows with their errors to this JSONL file.')
+def import_catalog_command(kind, path, format, batch_size, method, rejects):
+    """Stream venues, artists or shows from a CSV/JSONL file into the database."""
+    format = format or ('csv' if path.endswith('.csv') else 'jsonl')
+    rejects_file = open(rejects, 'w') if rejects else None
+
+    def on_reject(line_number, row, errors):
+        if rejects_file:
+            rejects_file.write(json.dumps(
+                {'line': line_number, 'errors': errors, 'row': row}, default=str) + '\n')
+
+    def on_progress(report):
+        click.echo('{kind}: {read} read, {inserted} inserted, {rejected} rejected'.format(
+            kind=kind, **report.as_dict()))
 
+    try:
+        with open(path, newline='') as stream:
+            import_catalog(kind, read_rows(stream, format), batch_size=batch_size,
+                           method=method, on_reject=on_reject, on_progress=on_progress)
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+
+@bp.cli.command('export-catalog')
+@click.argument('kind', type=click.Choice(['venue', 'artist', 'show']))
+@click.option('--format', 'format', type=click.Choice(['ndjson', 'csv']), default='ndjson',
+              show_default=True)
+@click.option('--since', help='Only rows updated after this ISO-8601 timestamp.')
+@click.option('--output', type=click.File('w'), default='-', help='Defaults to stdout.')
+@click.option('--batch-size', default=EXPORT_BATCH_SIZE, show_default=True)
+def export_catalog_command(kind, format, since, output, batch_size):
+    """Dump venues, artists or shows as NDJSON or CSV in constant memory."""
+    since = parse_start_time(since) if since else None
+    for chunk in export_catalog(kind, format, since=since, batch_size=batch_size):
+        output.write(chunk)
+
+
+@bp.cli.command('build-assets')
+def build_assets_command():
+    """Bundle, minify, fingerprint and precompress CSS/JS into static/dist.
+
+    Run on deploy before the workers start; they read the manifest once.
+    """
+    manifest = build_assets(current_app.static_folder, current_app.static_url_path)
+    for name, filename in sorted(manifest.items()):
+        click.echo('{} -> {}'.format(name, filename))
+
+
+@bp.cli.command('check-query-budgets')
+def check_query_budgets_command():
+    """Fail if a budgeted route issues more SQL statements than allowed.
+
+    Run against data from benchmarks/generate_data.py at several scales; the
+    counts must not grow with the catalog.
+    """
+    # query_budget doubles as a pytest plugin; keep it off the import path
+    from query_budget import check_route_budgets
+    failed = False
+    for route, count, budget, error in check_route_budgets(current_app._get_current_object()):
+        click.echo('{:<20} {:>3} / {:<3} {}'.format(route, count, budget, 'FAIL' if error else 'ok'))
+        if error:
+            click.echo(error, err=True)
+            failed = True
+    if failed:
+        raise SystemExit(1)
 
-app.jinja_env.filters['datetime'] = format_datetime
 
 # ---------------------------------------------------------------------------- #
 # Controllers.
 # ---------------------------------------------------------------------------- #
 
 
-@app.route('/')
+@bp.route('/')
 def index():
-    addVenueData()
-    addArtistData()
-    addShowsData()
     return render_template('pages/home.html')
 
 
 #  Venues
 #  ----------------------------------------------------------------
 
-@app.route('/venues')
+@bp.route('/venues')
+@conditional(venues_stamp)
+@cache.cached_page('venues')
 def venues():
-    locations = db.session.query(
-        Venue.city, Venue.state).group_by(Venue.city, Venue.state).all()
+    # optional pagination by area: /venues?page=2&per_page=50
+    # optional genre filter: /venues?genre=Jazz&genre=Folk&match=all
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', type=int)
+    if per_page is not None:
+        per_page = min(max(per_page, 1), current_app.config['VENUES_MAX_PER_PAGE'])
+    genres, match = requested_genres(request.args)
+
+    # areas come from the area table, whose counts skip empty ones without a scan
+    query = db.session.query(Area.id.label('area_id'), Area.city, Area.state, Venue.id,
+                             Venue.name, Venue.num_upcoming_shows).join(
+        Area, Venue.area_id == Area.id)
+    if genres:
+        query = query.filter(genre_filter(Venue, genres, match))
+    if per_page:
+        areas = db.session.query(Area.id).filter(Area.venue_count > 0)
+        if genres:
+            areas = areas.filter(db.session.query(Venue.id).filter(
+                Venue.area_id == Area.id, genre_filter(Venue, genres, match)).exists())
+        areas_page = areas.order_by(Area.state, Area.city_key).limit(
+            per_page).offset((page - 1) * per_page).subquery()
+        query = query.join(areas_page, Area.id == areas_page.c.id)
+    rows = query.order_by(Area.state, Area.city_key, Venue.name).all()
+
+    # rows arrive sorted by area, so one pass groups them
     venues = []
-    for location in locations:
-        (city, state) = location
-        city_venues = Venue.query.filter(
-            Venue.city == city).filter(Venue.state == state).all()
-        venues.append({'city': city, 'state': state, 'venues': city_venues})
-
-    return render_template('pages/venues.html', areas=venues)
-
-
-@ app.route('/venues/search', methods=['POST'])
+    for (area_id, city, state), area_rows in groupby(
+            rows, key=lambda row: (row.area_id, row.city, row.state)):
+        venues.append({
+            'city': city,
+            'state': state,
+            'venues': [{
+                'id': row.id,
+                'name': row.name,
+                'num_upcoming_shows': row.num_upcoming_shows or 0
+            } for row in area_rows]
+        })
+
+    pagination = None
+    if per_page:
+        pagination = {
+            'page': page,
+            'per_page': per_page,
+            'has_prev': page > 1,
+            'has_next': len(venues) == per_page
+        }
+    # tagged apart from 'venues', which every show write and rollover bumps
+    facets = cache.get_or_set('genre_facets:venue', ['venue_genres'],
+                              lambda: genre_facets(Venue))
+    return render_template('pages/venues.html', areas=venues, pagination=pagination,
+                           facets=facets, genres=genres, match=match)
+
+
+@ bp.route('/areas/<state>/<city>')
+@cache.cached_page('venues', 'artists')
+def show_area(state, city):
+    # venues and artists in one city: /areas/CA/San%20Francisco
+    area = Area.query.filter_by(state=state.upper(), city_key=city_key(city)).first_or_404()
+    venues = db.session.query(Venue.id, Venue.name, Venue.num_upcoming_shows).filter(
+        Venue.area_id == area.id).order_by(Venue.name).all()
+    artists = db.session.query(Artist.id, Artist.name, Artist.upcoming_shows_count).filter(
+        Artist.area_id == area.id).order_by(Artist.name).all()
+    return render_template('pages/show_area.html', area=area, venues=venues, artists=artists)
+
+
+@ bp.route('/venues/search', methods=['GET', 'POST'])
 def search_venues():
-    search_value = request.form.get('search_term', '')
-    search_term = "%{}%".format(search_value)
-    venues = Venue.query.filter(func.lower(
-        Venue.name).like(func.lower(search_term))).all()
-    data = []
-    for venue in venues:
-        data.append({'id': venue.id, 'name': venue.name})
-    response = {"count": len(venues), "data": data}
+    search_value = request.values.get('search_term', '')
+    page = max(request.args.get('page', 1, type=int), 1)
+    response = search(Venue, search_value, page=page,
+                      per_page=current_app.config['SEARCH_RESULTS_PER_PAGE'],
+                      count_cap=current_app.config['SEARCH_COUNT_CAP'])
 
     return render_template('pages/search_venues.html', results=response, search_term=search_value)
 
 
-@ app.route('/venues/<int:venue_id>')
+@ bp.route('/venues/<int:venue_id>')
+@conditional(venue_stamp)
+@cache.cached_page('venue:{venue_id}')
 def show_venue(venue_id):
-    now = datetime.now()
-
-    venue = Venue.query.get(venue_id)
-    upcoming_shows = db.session.query(Show).join(
-        Venue, Show.venue_id == venue_id).filter(func.date(Show.start_time) > now).all()
-    past_shows = db.session.query(Show).join(
-        Venue, Show.venue_id == venue_id).filter(func.date(Show.start_time) < now).all()
-
-    data = {
-        "id": venue.id,
-        "name": venue.name,
-        "genres": venue.genres,
-        "address": venue.address,
-        "city": venue.city,
-        "state": venue.state,
-        "phone": venue.phone,
-        "website": venue.website,
-        "facebook_link": venue.facebook_link,
-        "seeking_talent": venue.seeking_talent,
-        "seeking_description": venue.seeking_description,
-        "image_link": venue.image_link,
-        "upcoming_shows": upcoming_shows,
-        "upcoming_shows_count": len(upcoming_shows),
-        "past_shows": past_shows,
-        "past_shows_count": len(past_shows)
-    }
-
-    if data:
-        return render_template('pages/show_venue.html', venue=data)
-    else:
-        return render_template('errors/404.html')
+    data = load_venue_detail(venue_id)
+    return render_template('pages/show_venue.html', venue=data)
 
 #  Create Venue
 #  ----------------------------------------------------------------
 
 
-@ app.route('/venues/create', methods=['GET'])
+@ bp.route('/venues/create', methods=['GET'])
 def create_venue_form():
+    from forms import VenueForm
     form = VenueForm()
     return render_template('forms/new_venue.html', form=form)
 
 
-@ app.route('/venues/create', methods=['POST'])
+@ bp.route('/venues/create', methods=['POST'])
 def create_venue_submission():
     errorFlag = False
     try:
@@ -235,6 +351,7 @@ def create_venue_submission():
     finally:
         db.session.close()
     if not errorFlag:
+        cache.invalidate('venues', 'venue_genres')
         # on successful db insert, flash success
         flash('Venue ' + request.form['name'] + ' was successfully listed!')
     else:
@@ -244,12 +361,14 @@ def create_venue_submission():
     return render_template('pages/home.html')
 
 
-@ app.route('/venues/<venue_id>/delete', methods=['GET', 'DELETE'])
+@ bp.route('/venues/<venue_id>/delete', methods=['GET', 'DELETE'])
 def delete_venue(venue_id):
     # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
     errorFlag = False
     try:
-        venue = Venue.query.filter_by(id=venue_id).delete()
+        venue = db.session.get(Venue, venue_id)
+        # through the session, not a bulk delete, so the area count follows
+        db.session.delete(venue)
         db.session.commit()
     except Exception as e:
         errorFlag = True
@@ -258,6 +377,7 @@ def delete_venue(venue_id):
         db.session.close()
 
     if not errorFlag:
+        invalidate_venue(venue_id)
         # on successful db insert, flash success
         flash('Venue was successfully deleted!')
     else:
@@ -270,73 +390,64 @@ def delete_venue(venue_id):
 #  ----------------------------------------------------------------
 
 
-@ app.route('/artists')
+@ bp.route('/artists')
+@conditional(artists_stamp)
+@cache.cached_page('artists')
 def artists():
-    artists = Artist.query.all()
-    return render_template('pages/artists.html', artists=artists)
-
-
-@ app.route('/artists/search', methods=['POST'])
+    # optional genre filter: /artists?genre=Jazz&genre=Folk&match=all
+    genres, match = requested_genres(request.args)
+    query = db.session.query(Artist.id, Artist.name, Artist.upcoming_shows_count)
+    if genres:
+        query = query.filter(genre_filter(Artist, genres, match))
+    artists = query.order_by(Artist.name).all()
+    facets = cache.get_or_set('genre_facets:artist', ['artist_genres'],
+                              lambda: genre_facets(Artist))
+    return render_template('pages/artists.html', artists=artists,
+                           facets=facets, genres=genres, match=match)
+
+
+@ bp.route('/artists/search', methods=['GET', 'POST'])
 def search_artists():
-    search_value = request.form.get('search_term', '')
-    search_term = "%{}%".format(search_value)
-    artists = Artist.query.filter(func.lower(
-        Artist.name).like(func.lower(search_term))).all()
-
-    data = []
-    for artist in artists:
-        data.append({'id': artist.id, 'name': artist.name})
-    response = {"count": len(artists), "data": data}
+    search_value = request.values.get('search_term', '')
+    page = max(request.args.get('page', 1, type=int), 1)
+    response = search(Artist, search_value, page=page,
+                      per_page=current_app.config['SEARCH_RESULTS_PER_PAGE'],
+                      count_cap=current_app.config['SEARCH_COUNT_CAP'])
 
     return render_template('pages/search_artists.html', results=response, search_term=search_value)
 
 
-@ app.route('/artists/<int:artist_id>')
+@ bp.route('/artists/<int:artist_id>')
+@conditional(artist_stamp)
+@cache.cached_page('artist:{artist_id}')
 def show_artist(artist_id):
-    # shows the venue page with the given venue_id
-    now = datetime.now()
-
-    artist = Artist.query.get(artist_id)
-    upcoming_shows = db.session.query(Show).join(
-        Venue, Show.artist_id == artist_id).filter(func.date(Show.start_time) > now).all()
-    past_shows = db.session.query(Show).join(
-        Venue, Show.artist_id == artist_id).filter(func.date(Show.start_time) < now).all()
-
-    data = {
-        "id": artist.id,
-        "name": artist.name,
-        "genres": artist.genres,
-        "city": artist.city,
-        "state": artist.state,
-        "phone": artist.phone,
-        "website": artist.website,
-        "facebook_link": artist.facebook_link,
-        "seeking_venue": artist.seeking_venue,
-        "seeking_description": artist.seeking_description,
-        "image_link": artist.image_link,
-        "upcoming_shows": upcoming_shows,
-        "upcoming_shows_count": len(upcoming_shows),
-        "past_shows": past_shows,
-        "past_shows_count": len(past_shows)
-    }
-    if data:
-        return render_template('pages/show_artist.html', artist=data)
-    else:
-        return render_template('errors/404.html')
+    # shows the artist page with the given artist_id
+    data = load_artist_detail(artist_id)
+    return render_template('pages/show_artist.html', artist=data)
+
+@ bp.route('/search/autocomplete')
+def search_autocomplete():
+    # JSON name suggestions: /search/autocomplete?type=artist&q=gun
+    model = Artist if request.args.get('type') == 'artist' else Venue
+    prefix = request.args.get('q', '')
+    if not prefix.strip():
+        return jsonify([])
+    return jsonify(autocomplete(model, prefix, limit=current_app.config['AUTOCOMPLETE_LIMIT']))
 
 #  Update
 #  ----------------------------------------------------------------
 
 
-@ app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@ bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
+    from forms import ArtistForm
     form = ArtistForm()
     artist = Artist.query.get(artist_id)
     form.genres.data = artist.genres
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
 
-@ app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@ bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
     errorFlag = False
     try:
@@ -356,6 +467,7 @@ def edit_artist_submission(artist_id):
     finally:
         db.session.close()
     if not errorFlag:
+        invalidate_artist(artist_id)
         # on successful db insert, flash success
         flash('Artist ' + request.form['name'] + ' was successfully updated!')
     else:
@@ -363,11 +475,12 @@ def edit_artist_submission(artist_id):
         flash('An error occurred. Artist ' +
               request.form['name'] + ' could not be listed.')
 
-    return redirect(url_for('show_artist', artist_id=artist_id))
+    return redirect(url_for('.show_artist', artist_id=artist_id))
 
 
-@ app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@ bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
+    from forms import VenueForm
     form = VenueForm()
     venue = Venue.query.get(venue_id)
     form.name.data = venue.name
@@ -380,7 +493,7 @@ def edit_venue(venue_id):
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
 
-@ app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@ bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
     # venue record with ID <venue_id> using the new attributes
     errorFlag = False
@@ -402,24 +515,26 @@ def edit_venue_submission(venue_id):
     finally:
         db.session.close()
     if not errorFlag:
+        invalidate_venue(venue_id)
         # on successful db insert, flash success
         flash('Venue ' + request.form['name'] + ' was successfully updated!')
     else:
         flash('An error occurred. Venue ' +
               request.form['name'] + ' could not be updated.')
-    return redirect(url_for('show_venue', venue_id=venue_id))
+    return redirect(url_for('.show_venue', venue_id=venue_id))
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
 
-@ app.route('/artists/create', methods=['GET'])
+@ bp.route('/artists/create', methods=['GET'])
 def create_artist_form():
+    from forms import ArtistForm
     form = ArtistForm()
     return render_template('forms/new_artist.html', form=form)
 
 
-@ app.route('/artists/create', methods=['POST'])
+@ bp.route('/artists/create', methods=['POST'])
 def create_artist_submission():
     # called upon submitting the new artist listing form
     errorFlag = False
@@ -444,6 +559,7 @@ def create_artist_submission():
     finally:
         db.session.close()
     if not errorFlag:
+        cache.invalidate('artists', 'artist_genres')
         # on successful db insert, flash success
         flash('Artist ' + request.form['name'] + ' was successfully listed!')
     else:
@@ -456,82 +572,144 @@ def create_artist_submission():
 #  Shows
 #  ----------------------------------------------------------------
 
-@ app.route('/shows')
+@ bp.route('/shows')
+@conditional(shows_stamp)
+@cache.cached_page('shows')
 def shows():
-    # displays list of shows at /shows
-    data = []
-    shows = Show.query.join(Venue, Show.venue_id == Venue.id).join(
-        Artist, Artist.id == Show.artist_id).all()
-    for show in shows:
-        showData = {
-            "venue_id": show.venue_id,
-            "venue_name": show.venue.name,
-            "artist_id": show.artist_id,
-            "artist_name": show.artist.name,
-            "artist_image_link": show.artist.image_link,
-            "start_time": show.start_time
-        }
-        data.append(showData)
-    return render_template('pages/shows.html', shows=data)
+    # displays list of shows at /shows, a page at a time or streamed with ?stream=1
+    cursor = request.args.get('cursor')
+    if request.args.get('stream'):
+        rows = stream_shows(cursor, batch_size=current_app.config['SHOWS_STREAM_BATCH_SIZE'])
+        return Response(stream_with_context(
+            stream_template('pages/shows.html', shows=rows, next_cursor=None)))
+
+    per_page = min(request.args.get('per_page', current_app.config['SHOWS_PER_PAGE'], type=int),
+                   current_app.config['SHOWS_MAX_PER_PAGE'])
+    rows, next_cursor = load_shows_page(cursor, per_page=max(per_page, 1))
+    return render_template('pages/shows.html', shows=rows, next_cursor=next_cursor)
 
 
-@ app.route('/shows/create')
+@ bp.route('/shows/create')
 def create_shows():
     # renders form. do not touch.
+    from forms import ShowForm
     form = ShowForm()
     return render_template('forms/new_show.html', form=form)
 
 
-@ app.route('/shows/create', methods=['POST'])
+@ bp.route('/shows/create', methods=['POST'])
 def create_show_submission():
     errorFlag = False
+    conflictFlag = False
     submission = request.form
     try:
         show = Show()
         show.venue_id = submission['venue_id']
         show.artist_id = submission['artist_id']
-        show.start_time = submission['start_time']
+        show.start_time = parse_start_time(submission['start_time'])
+        if submission.get('duration_minutes'):
+            show.duration_minutes = int(submission['duration_minutes'])
         db.session.add(show)
         db.session.commit()
     except Exception as e:
         errorFlag = True
+        # the exclusion constraints reject double bookings
+        conflictFlag = is_booking_conflict(e)
         db.session.rollback()
     finally:
         db.session.close()
 
     if not errorFlag:
+        invalidate_show(submission['venue_id'], submission['artist_id'])
         # on successful db insert, flash success
         flash('Show was successfully listed!')
+    elif conflictFlag:
+        flash('The venue or the artist is already booked at that time. Show could not be listed.')
     else:
         flash('An error occurred. Show could not be listed.')
     return render_template('pages/home.html')
 
 
-@ app.errorhandler(404)
+#  Import
+#  ----------------------------------------------------------------
+
+def require_token(setting):
+    # bulk endpoints are disabled unless the token is configured;
+    # callers send it as a bearer token
+    token = current_app.config.get(setting)
+    if not token:
+        abort(404)
+    if request.headers.get('Authorization') != 'Bearer ' + token:
+        abort(401)
+
+
+@ bp.route('/import/<any(venue, artist, show):kind>', methods=['POST'])
+def import_submission(kind):
+    require_token('IMPORT_TOKEN')
+    format = request.args.get('format', 'jsonl')
+    rejects = []
+
+    def on_reject(line_number, row, errors):
+        if len(rejects) < current_app.config['IMPORT_MAX_REPORTED_REJECTS']:
+            rejects.append({'line': line_number, 'errors': errors})
+
+    # read the body as it arrives instead of buffering the whole upload
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    report = import_catalog(kind, read_rows(stream, format),
+                            batch_size=request.args.get('batch_size', IMPORT_BATCH_SIZE, type=int),
+                            on_reject=on_reject)
+    return jsonify(dict(report.as_dict(), rejects=rejects))
+
+
+@ bp.route('/export/<any(venue, artist, show):kind>.<any(ndjson, csv):format>')
+def export_download(kind, format):
+    # chunked response fed by a server-side cursor; ?since= for incremental dumps
+    require_token('EXPORT_TOKEN')
+    since = request.args.get('since')
+    try:
+        since = parse_start_time(since) if since else None
+    except (ValueError, OverflowError):
+        abort(400, 'Invalid ?since=')
+    chunks = export_catalog(kind, format, since=since)
+    mimetype = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': 'attachment; filename={}s.{}'.format(kind, format)})
+
+
+#  Status
+#  ----------------------------------------------------------------
+
+@ bp.route('/status/pool')
+def pool_status():
+    # checkout counts and wait times for this worker's connection pool
+    require_token('STATUS_TOKEN')
+    return jsonify(all_pool_stats())
+
+
+@ bp.route('/metrics')
+def prometheus_metrics():
+    # Prometheus scrape endpoint for this worker
+    require_token('METRICS_TOKEN')
+    return Response(metrics.render(all_pool_stats()),
+                    mimetype='text/plain; version=0.0.4')
+
+
+@ bp.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
 
-@ app.errorhandler(500)
+@ bp.app_errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 # ---------------------------------------------------------------------------- #
 # Launch.
 # ---------------------------------------------------------------------------- #
 
+app = create_app()
+
 # Default port:
 if __name__ == '__main__':
     app.run()
@@ -0,0 +1,114 @@
+import re
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from models import db, Venue, Artist, Area
+
+# ---------------------------------------------------------------------------- #
+# Areas.
+# ---------------------------------------------------------------------------- #
+
+# (model, area counter)
+AREA_COUNTERS = ((Venue, Area.__table__.c.venue_count),
+                 (Artist, Area.__table__.c.artist_count))
+
+
+# what \s matches in Postgres; str.split() would also split on e.g. U+00A0
+WHITESPACE = re.compile(r'[ \t\n\r\f\v]+')
+
+
+def city_name(city):
+    # keep in step with city_name_sql(): collapse whitespace, then trim, so
+    # leading tabs and newlines go too (btrim alone only strips spaces)
+    return WHITESPACE.sub(' ', city).strip(' ')
+
+
+def city_key(city):
+    return city_name(city).lower()
+
+
+def city_name_sql(column):
+    return func.btrim(func.regexp_replace(column, r'\s+', ' ', 'g'))
+
+
+def city_key_sql(column):
+    return func.lower(city_name_sql(column))
+
+
+def upsert_area(connection, state, city):
+    """Id of the area for state and city, creating it if needed."""
+    if not state or not city or not city_name(city):
+        return None
+    table = Area.__table__
+    statement = insert(table).values(
+        state=state, city_key=city_key(city), city=city_name(city))
+    # a no-op update so RETURNING also yields the id of an existing row
+    statement = statement.on_conflict_do_update(
+        constraint='uq_area_state_city_key', set_={'state': statement.excluded.state})
+    return connection.execute(statement.returning(table.c.id)).scalar()
+
+
+def adjust_area(connection, counter, area_id, delta):
+    if area_id is not None:
+        table = Area.__table__
+        connection.execute(table.update().where(table.c.id == area_id).values(
+            {counter: counter + delta}))
+
+
+def assign_area(mapper, connection, target):
+    instance = inspect(target)
+    if instance.persistent and not (instance.attrs.city.history.has_changes()
+                                    or instance.attrs.state.history.has_changes()):
+        return
+    target.area_id = upsert_area(connection, target.state, target.city)
+
+
+def listen(model, counter):
+    event.listen(model, 'before_insert', assign_area)
+    event.listen(model, 'before_update', assign_area)
+
+    @event.listens_for(model, 'after_insert')
+    def count_inserted(mapper, connection, target):
+        adjust_area(connection, counter, target.area_id, 1)
+
+    @event.listens_for(model, 'after_delete')
+    def count_deleted(mapper, connection, target):
+        adjust_area(connection, counter, target.area_id, -1)
+
+    @event.listens_for(model, 'after_update')
+    def count_moved(mapper, connection, target):
+        history = inspect(target).attrs.area_id.history
+        if history.deleted and history.deleted[0] != target.area_id:
+            adjust_area(connection, counter, history.deleted[0], -1)
+            adjust_area(connection, counter, target.area_id, 1)
+
+
+for model, counter in AREA_COUNTERS:
+    listen(model, counter)
+
+
+def sync_areas():
+    """Rebuild area links and counts from the venue and artist tables.
+
+    Used after bulk loads, which bypass the ORM events. Set-based, so it is
+    a few statements whatever the size of the catalog.
+    """
+    areas = Area.__table__
+    for model, _ in AREA_COUNTERS:
+        table = model.__table__
+        key = city_key_sql(table.c.city)
+        db.session.execute(insert(areas).from_select(
+            ['state', 'city_key', 'city'],
+            select(table.c.state, key, func.min(city_name_sql(table.c.city))).where(
+                table.c.state.isnot(None), key != '').group_by(
+                table.c.state, key)).on_conflict_do_nothing())
+        db.session.execute(table.update().where(
+            areas.c.state == table.c.state, areas.c.city_key == key,
+            table.c.area_id.is_distinct_from(areas.c.id)).values(area_id=areas.c.id))
+        db.session.execute(table.update().where(
+            table.c.area_id.isnot(None),
+            (table.c.state.is_(None)) | (func.coalesce(key, '') == '')).values(
+            area_id=None))
+    for model, counter in AREA_COUNTERS:
+        table = model.__table__
+        db.session.execute(areas.update().values({counter: select(func.count()).where(
+            table.c.area_id == areas.c.id).scalar_subquery()}))
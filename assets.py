@@ -0,0 +1,180 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from flask import current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # .br variants are skipped without it
+    brotli = None
+
+try:
+    from rjsmin import jsmin
+except ImportError:  # bundles are concatenated but not minified
+    jsmin = None
+
+# ---------------------------------------------------------------------------- #
+# Static asset bundles.
+# ---------------------------------------------------------------------------- #
+
+# bundle name -> source files under static/, in load order
+BUNDLES = {
+    'site.css': (
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ),
+    'head.js': (
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+    ),
+    'site.js': (
+        'js/script.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+    ),
+}
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+
+# precompressed variants, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# fingerprinted names never change content, so caches may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def minify_css(text):
+    # conservative: drop comments and collapse whitespace, nothing clever
+    text = CSS_COMMENT.sub('', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    return text.strip()
+
+
+def rebase_css_urls(text, source, static_url_path):
+    # the bundle is served from another path, so make relative urls absolute
+    base = posixpath.dirname(source)
+
+    def rebase(match):
+        quote, target = match.groups()
+        if re.match(r'^(/|[a-z]+:|#)', target):
+            return match.group(0)
+        return 'url({0}{1}/{2}{0})'.format(
+            quote, static_url_path, posixpath.normpath(posixpath.join(base, target)))
+    return CSS_URL.sub(rebase, text)
+
+
+def bundle_content(name, sources, static_folder, static_url_path):
+    parts = []
+    for source in sources:
+        with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+            text = f.read()
+        if name.endswith('.css'):
+            parts.append(minify_css(rebase_css_urls(text, source, static_url_path)))
+        else:
+            parts.append(jsmin(text) if jsmin else text)
+    # a newline and semicolon keep concatenated scripts from running together
+    return ('\n' if name.endswith('.css') else ';\n').join(parts).encode('utf-8')
+
+
+def fingerprinted(name, content):
+    stem, extension = os.path.splitext(name)
+    return '{}.{}{}'.format(stem, hashlib.sha256(content).hexdigest()[:12], extension)
+
+
+def build_assets(static_folder, static_url_path='/static', bundles=BUNDLES):
+    """Write fingerprinted, precompressed bundles and their manifest.
+
+    Returns the manifest, {bundle name: fingerprinted file name}.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    for name, sources in bundles.items():
+        content = bundle_content(name, sources, static_folder, static_url_path)
+        filename = fingerprinted(name, content)
+        path = os.path.join(dist, filename)
+        with open(path, 'wb') as f:
+            f.write(content)
+        # mtime=0 keeps the .gz byte-identical across builds
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+        manifest[name] = filename
+
+    # written last and replaced atomically, so workers never read a manifest
+    # naming files that are not there yet
+    temporary = os.path.join(dist, MANIFEST + '.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temporary, os.path.join(dist, MANIFEST))
+    return manifest
+
+
+class Assets:
+    """Serves built bundles from /assets and adds asset_urls() to templates.
+
+    Without a manifest (nothing built yet) templates get the source files
+    from /static instead, so development works without a build step.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['assets'] = self
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+        app.jinja_env.globals['asset_urls'] = self.asset_urls
+
+    def dist_folder(self):
+        return os.path.join(current_app.static_folder, DIST_DIR)
+
+    def manifest(self):
+        # read once per process; `flask build-assets` runs before workers start
+        state = current_app.extensions.setdefault('assets_manifest', {})
+        if 'manifest' not in state:
+            try:
+                with open(os.path.join(self.dist_folder(), MANIFEST)) as f:
+                    state['manifest'] = json.load(f)
+            except FileNotFoundError:
+                state['manifest'] = {}
+        return state['manifest']
+
+    def asset_urls(self, name):
+        filename = self.manifest().get(name)
+        if filename:
+            return [url_for('assets', filename=filename)]
+        return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+    def serve(self, filename):
+        # files from earlier builds stay servable for pages rendered before a deploy
+        folder = self.dist_folder()
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            if accepted[encoding] and os.path.exists(os.path.join(folder, filename + suffix)):
+                response = send_from_directory(folder, filename + suffix, conditional=True,
+                                               mimetype=mimetypes.guess_type(filename)[0])
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(folder, filename, conditional=True)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+assets = Assets()
@@ -0,0 +1,81 @@
+"""Cold-start time of the app: fresh interpreter, import app, build it.
+
+    $ python benchmarks/bench_startup.py [--runs 10] [--max-ms 800] [--json]
+
+Each run starts a new Python process, so nothing is warm but the OS file
+cache. Reports the min and median wall time of `import app`, which also
+runs create_app(). With --json, prints one JSON object that CI can record;
+with --max-ms, exits non-zero when the median exceeds the budget. Importing
+the app must not touch the database, so this runs without one.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = (
+    'import time; started = time.perf_counter(); import app; '
+    'print((time.perf_counter() - started) * 1000)'
+)
+
+
+def probe_env():
+    # the production configuration: create_app() insists on a key without DEBUG
+    return dict(os.environ, SECRET_KEY=os.environ.get('SECRET_KEY') or 'bench-startup')
+
+
+def measure(runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=ROOT, env=probe_env(), check=True,
+            capture_output=True, text=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def slowest_imports(count=10):
+    # -X importtime writes "cumulative | self | module" lines to stderr
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT,
+        env=probe_env(), check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1].strip()), parts[2].strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    timings = measure(args.runs)
+    result = {
+        'runs': args.runs,
+        'min_ms': round(min(timings), 1),
+        'median_ms': round(statistics.median(timings), 1),
+    }
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print('import app: min {min_ms} ms, median {median_ms} ms over {runs} runs'.format(**result))
+        print('slowest modules (cumulative us):')
+        for cumulative, module in slowest_imports():
+            print('  {:>9}  {}'.format(cumulative, module))
+
+    if args.max_ms and result['median_ms'] > args.max_ms:
+        sys.exit('median startup {} ms exceeds budget of {} ms'.format(
+            result['median_ms'], args.max_ms))
+
+
+if __name__ == '__main__':
+    main()
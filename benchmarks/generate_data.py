@@ -0,0 +1,188 @@
+"""Fill the database with a synthetic catalog of a given scale.
+
+    $ python benchmarks/generate_data.py --scale 10 --truncate
+
+Scale 1 is 1,000 venues, 10,000 artists and 500,000 shows; scale 10 gives
+the 10k / 100k / 5M catalog the load benchmark is sized for. --venues,
+--artists and --shows override single counts. Rows follow the shapes in
+models.py and defaultData.py (genres from the Genres enum, image links from
+the default data) and shows spread over two years either side of today,
+laid out so that no venue or artist is double-booked.
+Generation is deterministic for a given --seed.
+
+Writes go through importer.insert_rows, i.e. COPY on psycopg2, in batches
+that commit on their own; show counters and areas are rebuilt at the end.
+--truncate empties the tables first so ids run 1..N, which load.py relies
+on to pick random existing ids.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from areas import sync_areas  # noqa: E402
+from counters import recount_show_counters  # noqa: E402
+from defaultData import artists_default_data, venues_default_data  # noqa: E402
+from importer import insert_rows  # noqa: E402
+from models import db, Venue, Artist, Show  # noqa: E402
+from search import GENRE_NAMES  # noqa: E402
+
+BATCH_SIZE = 50000
+
+SHOW_MINUTES = 120
+
+CITIES = (
+    ('San Francisco', 'CA'), ('Los Angeles', 'CA'), ('San Diego', 'CA'),
+    ('New York', 'NY'), ('Brooklyn', 'NY'), ('Austin', 'TX'),
+    ('Houston', 'TX'), ('Chicago', 'IL'), ('Seattle', 'WA'),
+    ('Portland', 'OR'), ('Denver', 'CO'), ('Nashville', 'TN'),
+    ('New Orleans', 'LA'), ('Atlanta', 'GA'), ('Boston', 'MA'),
+    ('Philadelphia', 'PA'), ('Detroit', 'MI'), ('Minneapolis', 'MN'),
+    ('Miami', 'FL'), ('Phoenix', 'AZ'),
+)
+
+WORDS = (
+    'Blue', 'Velvet', 'Hop', 'Pianos', 'Park', 'Square', 'Hall', 'Room',
+    'Electric', 'Echo', 'Golden', 'Neon', 'Wild', 'River', 'Static', 'Moon',
+    'Iron', 'Silver', 'Lantern', 'Garden', 'Attic', 'Cellar', 'Harbor', 'Fox',
+)
+
+VENUE_IMAGES = [venue['image_link'] for venue in venues_default_data]
+ARTIST_IMAGES = [artist['image_link'] for artist in artists_default_data]
+
+
+def name(rng, index, suffix):
+    return '{} {} {} {}'.format(rng.choice(WORDS), rng.choice(WORDS), suffix, index)
+
+
+def venue_rows(rng, count):
+    for index in range(1, count + 1):
+        city, state = rng.choice(CITIES)
+        yield {
+            'name': name(rng, index, 'Club'),
+            'city': city,
+            'state': state,
+            'address': '{} {} Street'.format(rng.randint(1, 9999), rng.choice(WORDS)),
+            'phone': '{:03d}-{:03d}-{:04d}'.format(
+                rng.randint(200, 999), rng.randint(0, 999), rng.randint(0, 9999)),
+            'image_link': rng.choice(VENUE_IMAGES),
+            'genres': rng.sample(GENRE_NAMES, rng.randint(1, 4)),
+            'facebook_link': 'https://www.facebook.com/venue{}'.format(index),
+            'website': 'https://www.venue{}.example.com'.format(index),
+            'seeking_talent': rng.random() < 0.3,
+            'seeking_description': '',
+        }
+
+
+def artist_rows(rng, count):
+    for index in range(1, count + 1):
+        city, state = rng.choice(CITIES)
+        yield {
+            'name': name(rng, index, 'Band'),
+            'city': city,
+            'state': state,
+            'phone': '{:03d}-{:03d}-{:04d}'.format(
+                rng.randint(200, 999), rng.randint(0, 999), rng.randint(0, 9999)),
+            'image_link': rng.choice(ARTIST_IMAGES),
+            'genres': rng.sample(GENRE_NAMES, rng.randint(1, 3)),
+            'facebook_link': 'https://www.facebook.com/artist{}'.format(index),
+            'website': 'https://www.artist{}.example.com'.format(index),
+            'seeking_venue': rng.random() < 0.3,
+            'seeking_description': '',
+        }
+
+
+def show_rows(rng, count, venues, artists):
+    # shows are laid out in time slots: within a slot each venue hosts and
+    # each artist plays at most one show, and a show ends inside its slot, so
+    # nothing trips the double-booking constraints
+    per_slot = min(venues, artists)
+    slots = -(-count // per_slot)
+    duration = timedelta(minutes=SHOW_MINUTES)
+    spacing = max(timedelta(days=4 * 365) / slots, duration + timedelta(hours=1))
+    first = datetime.now(pytz.UTC).replace(minute=0, second=0, microsecond=0) - slots * spacing / 2
+    # a stride coprime with the artist count maps a slot's venues to distinct artists
+    stride = next(step for step in range(7919, 7919 + artists + 1) if math.gcd(step, artists) == 1)
+    jitter_steps = int((spacing - duration) / timedelta(minutes=15))
+    written = 0
+    for slot in range(slots):
+        slot_start = first + slot * spacing
+        for index in range(min(per_slot, count - written)):
+            yield {
+                'venue_id': (slot + index) % venues + 1,
+                'artist_id': (index * stride + slot) % artists + 1,
+                'start_time': slot_start + timedelta(minutes=15 * rng.randint(0, jitter_steps)),
+                'duration_minutes': SHOW_MINUTES,
+            }
+        written += per_slot
+
+
+def load(model, rows, total):
+    table = model.__table__
+    batch = []
+    started = time.perf_counter()
+    written = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            insert_rows(table, list(batch[0].keys()), batch, 'copy')
+            db.session.commit()
+            written += len(batch)
+            batch = []
+            print('  {}: {}/{} rows'.format(table.name, written, total), flush=True)
+    if batch:
+        insert_rows(table, list(batch[0].keys()), batch, 'copy')
+        db.session.commit()
+        written += len(batch)
+    print('{}: {} rows in {:.1f}s'.format(table.name, written, time.perf_counter() - started))
+
+
+def generate(venues, artists, shows, seed=1, truncate=False):
+    """Write the catalog; runs inside an app context. Also used by tests."""
+    rng = random.Random(seed)
+    if truncate:
+        db.session.execute(db.text(
+            'TRUNCATE show, venue, artist, area, show_counter_watermark RESTART IDENTITY CASCADE'))
+        db.session.commit()
+    load(Venue, venue_rows(rng, venues), venues)
+    load(Artist, artist_rows(rng, artists), artists)
+    load(Show, show_rows(rng, shows, venues, artists), shows)
+
+    started = time.perf_counter()
+    recount_show_counters()
+    sync_areas()
+    db.session.commit()
+    print('counters and areas synced in {:.1f}s'.format(time.perf_counter() - started))
+    db.session.execute(db.text('ANALYZE venue, artist, show, area'))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1)
+    parser.add_argument('--venues', type=int)
+    parser.add_argument('--artists', type=int)
+    parser.add_argument('--shows', type=int)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--truncate', action='store_true')
+    args = parser.parse_args()
+
+    venues = args.venues or int(1000 * args.scale)
+    artists = args.artists or int(10000 * args.scale)
+    shows = args.shows or int(500000 * args.scale)
+
+    app = create_app()
+    with app.app_context():
+        generate(venues, artists, shows, seed=args.seed, truncate=args.truncate)
+
+
+if __name__ == '__main__':
+    main()
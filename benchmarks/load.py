@@ -0,0 +1,193 @@
+"""Load test every read route of a running server and report latency.
+
+    $ python benchmarks/load.py --url http://127.0.0.1:5000 --scale 10 \\
+          [--concurrency 8] [--requests 200] [--json] [--token TOKEN]
+
+Run it against a server on a database filled by generate_data.py with the
+same --scale, so the ids it picks exist. Each route gets --requests
+requests spread over --concurrency threads, each thread with one keep-alive
+connection; ids and search terms are drawn from a seeded RNG so runs are
+repeatable. Reports requests per second, errors and p50/p95/p99 latency per
+route; --json prints the same as one JSON object for CI to record.
+
+Form submissions are left out: they need CSRF tokens and would change the
+data under the next run. The token-guarded /status/pool and /metrics are
+included when --token is given; exports are bulk jobs, not request latency.
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, urlencode, urlsplit
+
+SEARCH_TERMS = ('blue', 'hall', 'echo', 'san', 'New York', 'Jazz', 'Rock n Roll', 'x')
+
+GENRES = ('Jazz', 'Rock n Roll', 'Folk', 'Blues', 'R&B', 'Hip-Hop', 'Classical', 'Pop')
+
+# a sample of the (city, state) pairs generate_data.py spreads the catalog over
+AREAS = (
+    ('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX'), ('Chicago', 'IL'),
+    ('Seattle', 'WA'), ('Nashville', 'TN'), ('New Orleans', 'LA'), ('Boston', 'MA'),
+)
+
+
+def routes(scale, token):
+    venues = int(1000 * scale)
+    artists = int(10000 * scale)
+    shows = int(500000 * scale)
+    routes = [
+        ('/', lambda rng: '/'),
+        ('/venues', lambda rng: '/venues'),
+        ('/venues?page', lambda rng: '/venues?page={}&per_page=5'.format(rng.randint(1, 4))),
+        ('/venues?genre', lambda rng: '/venues?' + genre_query(rng)),
+        ('/venues/<id>', lambda rng: '/venues/{}'.format(rng.randint(1, venues))),
+        ('/venues/search', lambda rng: '/venues/search?search_term={}'.format(
+            rng.choice(SEARCH_TERMS).replace(' ', '+'))),
+        ('/venues/create', lambda rng: '/venues/create'),
+        ('/venues/<id>/edit', lambda rng: '/venues/{}/edit'.format(rng.randint(1, venues))),
+        ('/artists', lambda rng: '/artists'),
+        ('/artists?genre', lambda rng: '/artists?' + genre_query(rng)),
+        ('/artists/<id>', lambda rng: '/artists/{}'.format(rng.randint(1, artists))),
+        ('/artists/search', lambda rng: '/artists/search?search_term={}'.format(
+            rng.choice(SEARCH_TERMS).replace(' ', '+'))),
+        ('/artists/create', lambda rng: '/artists/create'),
+        ('/artists/<id>/edit', lambda rng: '/artists/{}/edit'.format(rng.randint(1, artists))),
+        ('/areas/<state>/<city>', lambda rng: '/areas/{1}/{0}'.format(
+            *[quote(part) for part in rng.choice(AREAS)])),
+        ('/search/autocomplete', lambda rng: '/search/autocomplete?type={}&q={}'.format(
+            rng.choice(('venue', 'artist')), rng.choice(SEARCH_TERMS)[:2])),
+        ('/shows', lambda rng: '/shows'),
+        ('/shows?per_page=1000', lambda rng: '/shows?per_page=1000'),
+        # the whole listing, streamed; its time grows with --scale by design
+        ('/shows?stream=1', lambda rng: '/shows?stream=1'),
+        ('/shows/create', lambda rng: '/shows/create'),
+        ('/api/venues', lambda rng: '/api/venues'),
+        ('/api/venues/<id>', lambda rng: '/api/venues/{}'.format(rng.randint(1, venues))),
+        ('/api/artists', lambda rng: '/api/artists'),
+        ('/api/artists/<id>', lambda rng: '/api/artists/{}'.format(rng.randint(1, artists))),
+        ('/api/shows', lambda rng: '/api/shows'),
+        ('/api/shows/<id>', lambda rng: '/api/shows/{}'.format(rng.randint(1, shows))),
+        ('/api/venues/<id>/availability', lambda rng: '/api/venues/{}/availability?{}'.format(
+            rng.randint(1, venues), availability_window(rng))),
+        ('/not-found', lambda rng: '/no/such/page'),
+    ]
+    if token:
+        routes += [
+            ('/status/pool', lambda rng: '/status/pool'),
+            ('/metrics', lambda rng: '/metrics'),
+        ]
+    return routes
+
+
+def genre_query(rng):
+    # one genre, or two that must all match
+    genres = rng.sample(GENRES, rng.randint(1, 2))
+    return urlencode([('genre', genre) for genre in genres] + [('match', 'all')] * (len(genres) - 1))
+
+
+def availability_window(rng):
+    start = datetime.now(timezone.utc).date() + timedelta(days=rng.randint(-60, 60))
+    return 'start={}&end={}&min_minutes=120'.format(start, start + timedelta(days=30))
+
+
+def percentile(sorted_values, fraction):
+    # nearest-rank
+    if not sorted_values:
+        return None
+    index = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def worker(target, paths, headers, timings, errors, lock):
+    connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=60)
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            failed = response.status >= 500
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=60)
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            timings.append(elapsed)
+            if failed:
+                errors.append(path)
+    connection.close()
+
+
+def run_route(target, make_path, rng, requests, concurrency, headers):
+    paths = [target.path.rstrip('/') + make_path(rng) for _ in range(requests)]
+    timings, errors, lock = [], [], threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(
+            target, paths[index::concurrency], headers, timings, errors, lock))
+        for index in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        'requests': len(timings),
+        'errors': len(errors),
+        'rps': len(timings) / wall if wall else 0.0,
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--scale', type=float, default=1)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--route', action='append',
+                        help='only run routes containing this text; repeatable')
+    parser.add_argument('--token', help='bearer token for /status/pool and /metrics')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    target = urlsplit(args.url)
+    headers = {'Authorization': 'Bearer ' + args.token} if args.token else {}
+    rng = random.Random(args.seed)
+
+    results = {}
+    for name, make_path in routes(args.scale, args.token):
+        if args.route and not any(text in name for text in args.route):
+            continue
+        if args.warmup:
+            run_route(target, make_path, rng, args.warmup, 1, headers)
+        results[name] = run_route(target, make_path, rng, args.requests,
+                                  args.concurrency, headers)
+        if not args.json:
+            result = results[name]
+            print('{:<24} {:>7.1f} req/s  p50 {:>8.1f} ms  p95 {:>8.1f} ms  '
+                  'p99 {:>8.1f} ms  {} errors'.format(
+                      name, result['rps'], result['p50_ms'], result['p95_ms'],
+                      result['p99_ms'], result['errors']), flush=True)
+
+    if args.json:
+        print(json.dumps({'url': args.url, 'scale': args.scale,
+                          'concurrency': args.concurrency, 'routes': results}))
+    if any(result['errors'] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
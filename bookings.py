@@ -0,0 +1,117 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import DateTime, Integer, and_, column, func, select, values
+from sqlalchemy.exc import IntegrityError
+from models import db, Show
+
+# ---------------------------------------------------------------------------- #
+# Bookings.
+# ---------------------------------------------------------------------------- #
+
+DEFAULT_DURATION = timedelta(minutes=120)
+
+# SQLSTATE exclusion_violation, raised by show_venue_no_overlap and
+# show_artist_no_overlap
+EXCLUSION_VIOLATION = '23P01'
+
+
+def is_booking_conflict(error):
+    return (isinstance(error, IntegrityError)
+            and getattr(error.orig, 'pgcode', None) == EXCLUSION_VIOLATION)
+
+
+def show_range():
+    # the exact expression of the exclusion constraints, so their GiST
+    # indexes serve these lookups
+    return func.tstzrange(Show.start_time, Show.end_time)
+
+
+def overlapping(key, owner_id, start, end):
+    return select(Show.id, Show.start_time, Show.end_time).where(
+        key == owner_id, show_range().op('&&')(func.tstzrange(start, end)))
+
+
+def batch_conflicts(shows):
+    """Positions in shows that would double-book a venue or an artist.
+
+    shows are dicts with venue_id, artist_id, start_time and end_time. A
+    show conflicts with an existing one or with an earlier show in the list.
+    Existing bookings come from one query per side, which joins a VALUES
+    list of (owner, window) to the GiST index once per owner.
+    """
+    conflicts = set()
+    for key, field in ((Show.venue_id, 'venue_id'), (Show.artist_id, 'artist_id')):
+        by_owner = defaultdict(list)
+        for position, show in enumerate(shows):
+            by_owner[show[field]].append(position)
+        if not by_owner:
+            continue
+
+        windows = values(
+            column('owner_id', Integer),
+            column('low', DateTime(timezone=True)),
+            column('high', DateTime(timezone=True)),
+            name='windows',
+        ).data([(owner_id,
+                 min(shows[position]['start_time'] for position in positions),
+                 max(shows[position]['end_time'] for position in positions))
+                for owner_id, positions in by_owner.items()])
+        booked = defaultdict(list)
+        for row in db.session.execute(
+                select(key.label('owner_id'), Show.start_time, Show.end_time).join(
+                    windows, and_(key == windows.c.owner_id, show_range().op('&&')(
+                        func.tstzrange(windows.c.low, windows.c.high))))):
+            booked[row.owner_id].append((row.start_time, row.end_time))
+
+        for owner_id, positions in by_owner.items():
+            taken = booked[owner_id]
+            for position in sorted(positions, key=lambda position: shows[position]['start_time']):
+                if position in conflicts:
+                    continue
+                show = shows[position]
+                if any(show['start_time'] < taken_end and taken_start < show['end_time']
+                       for taken_start, taken_end in taken):
+                    conflicts.add(position)
+                else:
+                    taken.append((show['start_time'], show['end_time']))
+    return conflicts
+
+
+def venue_availability(venue_id, start, end, min_duration=None):
+    """Busy and free intervals of a venue between start and end.
+
+    One range query over the venue's shows in the window; gaps shorter than
+    min_duration are left out of the free list.
+    """
+    rows = db.session.execute(
+        overlapping(Show.venue_id, venue_id, start, end).order_by(Show.start_time)).all()
+    return busy_and_free([(row.start_time, row.end_time) for row in rows],
+                         start, end, min_duration)
+
+
+def busy_and_free(bookings, start, end, min_duration=None):
+    """Merge (start, end) bookings, sorted by start, within [start, end).
+
+    Returns (busy, free): overlapping or touching bookings merged and clipped
+    to the window, and the gaps between them at least min_duration long.
+    """
+    busy = []
+    for booking_start, booking_end in bookings:
+        low, high = max(booking_start, start), min(booking_end, end)
+        if busy and low <= busy[-1][1]:
+            busy[-1][1] = max(busy[-1][1], high)
+        else:
+            busy.append([low, high])
+
+    free = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_start > cursor:
+            free.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if cursor < end:
+        free.append((cursor, end))
+    if min_duration:
+        free = [(free_start, free_end) for free_start, free_end in free
+                if free_end - free_start >= min_duration]
+    return [tuple(interval) for interval in busy], free
@@ -0,0 +1,228 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import g, request, session, make_response
+from models import db, Show
+
+# ---------------------------------------------------------------------------- #
+# Cache backends.
+# ---------------------------------------------------------------------------- #
+
+
+class NullBackend:
+    def get_many(self, keys):
+        return [None] * len(keys)
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def add(self, key, value):
+        pass
+
+    def incr(self, key):
+        pass
+
+
+class InProcessBackend:
+    """Thread-safe LRU dict with per-entry TTL, local to one worker."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        # tag versions live outside the LRU so they are never evicted
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def get(self, key):
+        with self.lock:
+            if key in self.versions:
+                return self.versions[key]
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def add(self, key, value):
+        with self.lock:
+            self.versions.setdefault(key, value)
+
+    def incr(self, key):
+        with self.lock:
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+
+class RedisBackend:
+    """Any server speaking the Redis protocol.
+
+    LRU eviction is the server's job: run it with maxmemory and
+    maxmemory-policy allkeys-lru.
+    """
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def get_many(self, keys):
+        return [self.decode(value) for value in self.client.mget(keys)]
+
+    def get(self, key):
+        return self.decode(self.client.get(key))
+
+    def set(self, key, value, ttl):
+        self.client.set(key, pickle.dumps(value), ex=ttl)
+
+    def add(self, key, value):
+        self.client.set(key, value, nx=True)
+
+    def incr(self, key):
+        self.client.incr(key)
+
+    @staticmethod
+    def decode(value):
+        if value is None:
+            return None
+        try:
+            # tag versions are stored as plain integers
+            return int(value)
+        except ValueError:
+            return pickle.loads(value)
+
+
+# ---------------------------------------------------------------------------- #
+# Page cache.
+# ---------------------------------------------------------------------------- #
+
+
+class Cache:
+    """Response cache keyed by URL and invalidated by tag.
+
+    Every cached page declares tags such as 'venues' or 'venue:{venue_id}'.
+    Each tag has a version number that is part of the cache key, so
+    invalidating a tag just bumps its version and every page carrying it
+    misses from then on.
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.default_ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        if backend == 'memory':
+            self.backend = InProcessBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        elif backend == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        else:
+            self.backend = NullBackend()
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        app.extensions['cache'] = self
+
+    def tag_versions(self, tags):
+        keys = ['tag:' + tag for tag in tags]
+        versions = self.backend.get_many(keys)
+        for index, version in enumerate(versions):
+            if version is None:
+                # seed unknown tags with a fresh value so a tag that was lost
+                # (eviction, restart) can never revive old entries
+                self.backend.add(keys[index], time.time_ns())
+                versions[index] = self.backend.get(keys[index])
+        return versions
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.incr('tag:' + tag)
+
+    def get_or_set(self, key, tags, create, ttl=None):
+        """Return the value cached under key and tags, calling create() on a miss."""
+        versions = self.tag_versions(tags)
+        key = 'value:{}|{}'.format(key, ','.join(
+            '{}={}'.format(tag, version) for tag, version in zip(tags, versions)))
+        value = self.backend.get(key)
+        if value is None:
+            value = create()
+            self.backend.set(key, value, ttl or self.default_ttl)
+        return value
+
+    def cached_page(self, *tag_templates, ttl=None):
+        """Cache a GET view's 200 responses under the given tags.
+
+        Tags are formatted with the view's arguments. Under @conditional the
+        page's ETag is part of the key too: the stamp sees changes no tag is
+        bumped for, such as a show moving from upcoming to past. Pages
+        rendered while flash messages are pending, and streamed responses,
+        are not cached.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                if request.method != 'GET' or '_flashes' in session:
+                    return view(**kwargs)
+                tags = [tag.format(**kwargs) for tag in tag_templates]
+                versions = self.tag_versions(tags)
+                key = 'page:{}|{}|{}'.format(request.full_path, g.get('etag', ''), ','.join(
+                    '{}={}'.format(tag, version) for tag, version in zip(tags, versions)))
+
+                cached = self.backend.get(key)
+                if cached is not None:
+                    body, mimetype = cached
+                    return make_response(body, 200, {'Content-Type': mimetype})
+
+                response = make_response(view(**kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    self.backend.set(key, (response.get_data(), response.content_type),
+                                     ttl or self.default_ttl)
+                return response
+            return wrapper
+        return decorator
+
+
+cache = Cache()
+
+
+# ---------------------------------------------------------------------------- #
+# Invalidation.
+# ---------------------------------------------------------------------------- #
+
+
+def invalidate_venue(venue_id):
+    # artist pages list the venues they play at
+    artist_ids = db.session.query(Show.artist_id).filter(
+        Show.venue_id == venue_id).distinct()
+    cache.invalidate('venues', 'venue_genres', 'shows', 'venue:{}'.format(venue_id),
+                     *['artist:{}'.format(row.artist_id) for row in artist_ids])
+
+
+def invalidate_artist(artist_id):
+    # venue pages list the artists playing there
+    venue_ids = db.session.query(Show.venue_id).filter(
+        Show.artist_id == artist_id).distinct()
+    cache.invalidate('artists', 'artist_genres', 'shows', 'artist:{}'.format(artist_id),
+                     *['venue:{}'.format(row.venue_id) for row in venue_ids])
+
+
+def invalidate_show(venue_id, artist_id):
+    # listings carry upcoming show counts
+    cache.invalidate('shows', 'venues', 'artists',
+                     'venue:{}'.format(venue_id), 'artist:{}'.format(artist_id))
@@ -0,0 +1,134 @@
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # only gzip is offered without it
+    brotli = None
+
+# ---------------------------------------------------------------------------- #
+# Response compression.
+# ---------------------------------------------------------------------------- #
+
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'application/json',
+    'application/javascript', 'application/x-ndjson',
+)
+
+
+def etag_variant(etag, encoding):
+    # a compressed body is a different representation, so its strong ETag differs
+    return '{}-{}'.format(etag, encoding)
+
+
+def encoded(chunks):
+    try:
+        for chunk in chunks:
+            yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+    finally:
+        # stream_with_context tears down its request context on close()
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def gzip_chunks(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in encoded(chunks):
+        # sync flush so each chunk reaches the client as soon as it is rendered
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def brotli_chunks(chunks, level):
+    compressor = brotli.Compressor(quality=level)
+    for chunk in encoded(chunks):
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class Compression:
+    """gzip/brotli for compressible responses, negotiated on Accept-Encoding.
+
+    Buffered bodies under COMPRESS_MIN_SIZE are sent as they are. Streamed
+    bodies are always compressed, chunk by chunk, so they keep streaming.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_LEVEL', 4)
+        app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+        self.config = app.config
+        app.after_request(self.compress)
+        app.extensions['compression'] = self
+
+    def encodings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def choose_encoding(self):
+        accepted = request.accept_encodings
+        best = None
+        for encoding in self.encodings():
+            quality = accepted[encoding]
+            if quality and (best is None or quality > accepted[best]):
+                best = encoding
+        return best
+
+    def compress(self, response):
+        if not self.config['COMPRESS_ENABLED'] or request.method == 'HEAD':
+            return response
+        if response.mimetype not in self.config['COMPRESS_MIMETYPES']:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if response.status_code == 304:
+            # echo the ETag variant the client holds
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                for encoding in self.encodings():
+                    if request.if_none_match.contains(etag_variant(etag, encoding)):
+                        response.set_etag(etag_variant(etag, encoding))
+            return response
+        if (response.status_code < 200 or response.status_code == 204
+                or 'Content-Encoding' in response.headers or response.direct_passthrough):
+            return response
+
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            chunks = response.response
+            if encoding == 'br':
+                response.response = brotli_chunks(chunks, self.config['COMPRESS_BROTLI_LEVEL'])
+            else:
+                response.response = gzip_chunks(chunks, self.config['COMPRESS_GZIP_LEVEL'])
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.config['COMPRESS_MIN_SIZE']:
+                return response
+            if encoding == 'br':
+                data = brotli.compress(data, quality=self.config['COMPRESS_BROTLI_LEVEL'])
+            else:
+                data = gzip.compress(data, compresslevel=self.config['COMPRESS_GZIP_LEVEL'])
+            response.set_data(data)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag_variant(etag, encoding))
+        return response
+
+
+compression = Compression()
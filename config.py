@@ -1,13 +1,96 @@
 import os
-SECRET_KEY = os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
+# Debug mode is opt-in: export DEBUG=1 for local development.
+DEBUG = os.environ.get('DEBUG') == '1'
+
+# Signs sessions, flash messages and CSRF tokens, so every worker and every
+# restart must share it. Required outside debug mode; generate one with
+# python -c "import secrets; print(secrets.token_hex(32))".
+SECRET_KEY = os.environ.get('SECRET_KEY') or (
+    'development-only-secret-key' if DEBUG else None)
 
 # Connect to the database
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL', 'postgresql://nik@localhost:5432/fyyur')
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Read replicas, comma-separated. GET requests read from one of them; writes,
+# *_submission views and delete_venue use the primary, and a client that just
+# wrote reads from the primary for READ_YOUR_WRITES_SECONDS. Keep replica lag
+# well under that window: a page cached from a lagging replica stays stale
+# until CACHE_DEFAULT_TTL.
+REPLICA_DATABASE_URLS = [
+    url.strip() for url in os.environ.get('REPLICA_DATABASE_URLS', '').split(',') if url.strip()]
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 10))
+
+# Connection pool, per worker process. Size it so that
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays under max_connections.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+# seconds to wait for a free connection before failing the request
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+# seconds after which connections are replaced, below any proxy idle timeout
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+# per-statement timeout, 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 15000))
+
+
+# Show listing page sizes
+SHOWS_PER_PAGE = 100
+SHOWS_MAX_PER_PAGE = 1000
+SHOWS_STREAM_BATCH_SIZE = 1000
+
+# /venues?per_page= counts areas, not venues
+VENUES_MAX_PER_PAGE = 200
+
+# Bookings: GET /api/venues/<id>/availability windows are capped at this
+AVAILABILITY_MAX_DAYS = 92
+
+# Search
+SEARCH_RESULTS_PER_PAGE = 20
+SEARCH_COUNT_CAP = 1000
+AUTOCOMPLETE_LIMIT = 10
+
+# Page cache: 'memory' (per worker), 'redis' (shared) or 'null' (disabled).
+# Invalidation only reaches the worker that made the write, so 'memory' is
+# for single-process servers; gunicorn.conf.py turns it into 'null' when it
+# starts more than one worker. The redis backend needs the redis package and
+# a server run with maxmemory-policy allkeys-lru.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+CACHE_DEFAULT_TTL = 300
+CACHE_MAX_ENTRIES = 1024
+
+# Mixed into every ETag; change it when templates change so clients refetch.
+ETAG_SALT = os.environ.get('ETAG_SALT', '')
+
+# gzip/brotli for HTML, JSON, CSV and NDJSON responses; brotli needs the
+# brotli package. Buffered bodies smaller than COMPRESS_MIN_SIZE bytes are
+# sent uncompressed. Turn off when a proxy in front already compresses.
+COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', '1') == '1'
+COMPRESS_MIN_SIZE = 500
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+COMPRESS_BROTLI_LEVEL = int(os.environ.get('COMPRESS_BROTLI_LEVEL', 4))
+
+# JSON API page sizes
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# Bulk import/export endpoints (POST /import/<kind>, GET /export/<kind>.<format>);
+# each is disabled while its token is unset.
+IMPORT_TOKEN = os.environ.get('IMPORT_TOKEN')
+EXPORT_TOKEN = os.environ.get('EXPORT_TOKEN')
+IMPORT_MAX_REPORTED_REJECTS = 100
 
+# Pool statistics endpoint (GET /status/pool); disabled while unset.
+STATUS_TOKEN = os.environ.get('STATUS_TOKEN')
 
-# IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI= 'postgresql://nik@localhost:5432/fyyur'
+# Instrumentation. GET /metrics is disabled while METRICS_TOKEN is unset.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+# add X-SQL-Count / X-SQL-Time-Ms / Server-Timing headers to every response
+METRICS_HEADERS = os.environ.get('METRICS_HEADERS') == '1'
+# log a warning when one request issues more SQL statements than this
+SQL_QUERY_BUDGET = int(os.environ.get('SQL_QUERY_BUDGET', 20))
@@ -0,0 +1,122 @@
+from datetime import datetime
+import pytz
+from sqlalchemy import and_, event, func, inspect, select
+from models import db, Venue, Artist, Show, ShowCounterWatermark
+
+# ---------------------------------------------------------------------------- #
+# Show counters.
+# ---------------------------------------------------------------------------- #
+
+# (owner table, show foreign key, upcoming counter, past counter)
+COUNTERS = (
+    (Venue.__table__, Show.__table__.c.venue_id,
+     Venue.__table__.c.num_upcoming_shows, Venue.__table__.c.num_past_shows),
+    (Artist.__table__, Show.__table__.c.artist_id,
+     Artist.__table__.c.upcoming_shows_count, Artist.__table__.c.past_shows_count),
+)
+
+WATERMARK_ID = 1
+
+
+def read_watermark(connection):
+    rolled_over_at = connection.execute(
+        select(ShowCounterWatermark.__table__.c.rolled_over_at).where(
+            ShowCounterWatermark.__table__.c.id == WATERMARK_ID)).scalar()
+    # before the first rollover, counters are classified against the clock
+    return rolled_over_at or datetime.now(pytz.UTC)
+
+
+def adjust_counters(connection, venue_id, artist_id, is_past, delta):
+    for table, show_key, upcoming, past in COUNTERS:
+        owner_id = venue_id if show_key.name == 'venue_id' else artist_id
+        counter = past if is_past else upcoming
+        connection.execute(table.update().where(table.c.id == owner_id).values(
+            {counter: func.coalesce(counter, 0) + delta, table.c.updated_at: func.now()}))
+
+
+@event.listens_for(Show, 'after_insert')
+def count_inserted_show(mapper, connection, show):
+    is_past = show.start_time <= read_watermark(connection)
+    adjust_counters(connection, show.venue_id, show.artist_id, is_past, 1)
+
+
+@event.listens_for(Show, 'after_delete')
+def count_deleted_show(mapper, connection, show):
+    is_past = show.start_time <= read_watermark(connection)
+    adjust_counters(connection, show.venue_id, show.artist_id, is_past, -1)
+
+
+@event.listens_for(Show, 'after_update')
+def count_reassigned_show(mapper, connection, show):
+    state = inspect(show)
+
+    def previous(key):
+        history = state.attrs[key].history
+        return history.deleted[0] if history.deleted else getattr(show, key)
+
+    old = (previous('venue_id'), previous('artist_id'), previous('start_time'))
+    new = (show.venue_id, show.artist_id, show.start_time)
+    if old == new:
+        return
+    watermark = read_watermark(connection)
+    adjust_counters(connection, old[0], old[1], old[2] <= watermark, -1)
+    adjust_counters(connection, new[0], new[1], new[2] <= watermark, 1)
+
+
+def recount_show_counters(venue_ids=None, artist_ids=None):
+    """Recompute counters from the show table.
+
+    Used after bulk loads, which bypass the ORM events. Limited to the given
+    ids when provided, otherwise every venue and artist is recounted.
+    """
+    cutoff = read_watermark(db.session.connection())
+    for table, show_key, upcoming, past in COUNTERS:
+        ids = venue_ids if show_key.name == 'venue_id' else artist_ids
+        shows = Show.__table__
+        upcoming_count = select(func.count()).where(
+            show_key == table.c.id, shows.c.start_time > cutoff).scalar_subquery()
+        past_count = select(func.count()).where(
+            show_key == table.c.id, shows.c.start_time <= cutoff).scalar_subquery()
+        statement = table.update().values(
+            {upcoming: upcoming_count, past: past_count, table.c.updated_at: func.now()})
+        if ids is not None:
+            statement = statement.where(table.c.id.in_(list(ids)))
+        db.session.execute(statement)
+
+
+def rollover_shows(now=None):
+    """Move shows that started since the last run from upcoming to past.
+
+    Only shows in the (last rollover, now] window are read, through the
+    start_time index. The first run has no window and recounts everything.
+    Returns (shows rolled over, {'venue': ids, 'artist': ids} of the owners
+    whose counters moved), or (None, None) after a full recount.
+    """
+    now = now or datetime.now(pytz.UTC)
+    watermark = db.session.query(ShowCounterWatermark).filter_by(
+        id=WATERMARK_ID).with_for_update().first()
+    if watermark is None:
+        db.session.add(ShowCounterWatermark(id=WATERMARK_ID, rolled_over_at=now))
+        db.session.flush()
+        recount_show_counters()
+        db.session.commit()
+        return None, None
+
+    shows = Show.__table__
+    window = and_(shows.c.start_time > watermark.rolled_over_at,
+                  shows.c.start_time <= now)
+    rolled_over = db.session.query(func.count()).select_from(shows).filter(
+        window).scalar()
+    owners = {}
+    for table, show_key, upcoming, past in COUNTERS:
+        moved = select(show_key.label('owner_id'), func.count().label('moved')).where(
+            window).group_by(show_key).subquery()
+        owners[table.name] = db.session.execute(
+            table.update().where(table.c.id == moved.c.owner_id).values({
+                upcoming: func.coalesce(upcoming, 0) - moved.c.moved,
+                past: func.coalesce(past, 0) + moved.c.moved,
+                table.c.updated_at: func.now()
+            }).returning(table.c.id)).scalars().all()
+    watermark.rolled_over_at = now
+    db.session.commit()
+    return rolled_over, owners
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import select
+from models import db, Venue, Artist, Show
+
+# ---------------------------------------------------------------------------- #
+# Catalog export.
+# ---------------------------------------------------------------------------- #
+
+EXPORT_BATCH_SIZE = 5000
+
+# flush output in chunks of roughly this many characters
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_MODELS = {'venue': Venue, 'artist': Artist, 'show': Show}
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def export_rows(kind, since=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield (columns, row) for every row of a table, in id order.
+
+    Rows are fetched through a server-side cursor batch_size at a time, so
+    memory does not grow with the table. With `since`, only rows whose
+    updated_at is later are exported.
+    """
+    table = EXPORT_MODELS[kind].__table__
+    statement = select(table).order_by(table.c.id)
+    if since is not None:
+        statement = statement.where(table.c.updated_at > since)
+    result = db.session.execute(statement.execution_options(
+        stream_results=True, max_row_buffer=batch_size))
+    columns = list(result.keys())
+    for row in result:
+        yield columns, row
+
+
+def ndjson_lines(rows):
+    for columns, row in rows:
+        yield json.dumps({column: export_value(value)
+                          for column, value in zip(columns, row)}) + '\n'
+
+
+def csv_lines(rows):
+    # arrays are comma-joined, the format `flask import-catalog` reads back
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    for columns, row in rows:
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerow([','.join(value) if isinstance(value, list) else export_value(value)
+                         for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_catalog(kind, format='ndjson', since=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the export as text chunks of about EXPORT_CHUNK_SIZE."""
+    lines = csv_lines if format == 'csv' else ndjson_lines
+    chunk = []
+    size = 0
+    for line in lines(export_rows(kind, since=since, batch_size=batch_size)):
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
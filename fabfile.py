@@ -7,12 +7,26 @@ from fabric.contrib.console import confirm
 def test():
     with settings(warn_only=True):
         result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
+            "python -m pytest -q tests"
+            " && python benchmarks/bench_startup.py --max-ms 1500"
+            " && flask check-query-budgets", capture=True
         )
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
 
 
+# benchmarks
+
+
+def generate_data(scale=1):
+    local("python benchmarks/generate_data.py --scale {} --truncate".format(scale))
+
+
+def bench(url="http://127.0.0.1:5000", scale=1):
+    local("python benchmarks/bench_startup.py")
+    local("python benchmarks/load.py --url {} --scale {}".format(url, scale))
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
@@ -39,9 +53,7 @@ def heroku():
 
 
 def heroku_test():
-    local(
-        "heroku run python test_tasks.py -v && heroku run python test_users.py -v"
-    )
+    local("heroku run python benchmarks/bench_startup.py --max-ms 1500")
 
 
 def deploy():
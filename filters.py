@@ -0,0 +1,37 @@
+from datetime import datetime
+from functools import lru_cache
+import dateutil.parser
+import pytz
+
+# ---------------------------------------------------------------------------- #
+# filters.
+# ---------------------------------------------------------------------------- #
+
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=64)
+def compiled_datetime_format(format, locale):
+    # babel re-resolves the pattern and locale on every format_datetime call;
+    # it is also slow to import, so it is loaded on the first render
+    from babel import Locale
+    from babel.dates import LC_TIME, parse_pattern
+    return parse_pattern(DATETIME_FORMATS.get(format, format)), Locale.parse(locale or LC_TIME)
+
+
+@lru_cache(maxsize=4096)
+def format_datetime(value, format='medium', locale=None):
+    """Jinja `datetime` filter.
+
+    Accepts datetimes as loaded from the database or ISO strings. Naive
+    values are taken as UTC, as babel does. Recently formatted values are
+    memoized, since listings repeat the same show times across renders.
+    """
+    date = value if isinstance(value, datetime) else dateutil.parser.parse(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=pytz.UTC)
+    pattern, locale = compiled_datetime_format(format, locale)
+    return pattern.apply(date, locale)
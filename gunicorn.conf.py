@@ -0,0 +1,45 @@
+import multiprocessing
+import os
+import sys
+
+# ---------------------------------------------------------------------------- #
+# gunicorn settings: gunicorn app:app (this file is picked up automatically).
+# ---------------------------------------------------------------------------- #
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:{}'.format(os.environ.get('PORT', 8000)))
+
+# the usual 2 * cores + 1 sync workers; each holds its own connection pool, so
+# keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) under Postgres max_connections
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'sync'
+
+# the in-process page cache is per worker and invalidating it only reaches the
+# worker that made the write, so other workers would keep serving stale pages;
+# share a redis cache between workers or cache nothing. Set before the app
+# (and config.py) is imported.
+if workers > 1 and os.environ.get('CACHE_BACKEND', 'memory') == 'memory':
+    print('gunicorn.conf.py: CACHE_BACKEND=memory is per worker, using null with '
+          '{} workers; set CACHE_BACKEND=redis to cache'.format(workers), file=sys.stderr)
+    os.environ['CACHE_BACKEND'] = 'null'
+
+# import the app once in the master and fork it, so workers share its memory
+# and start fast; importing the app never touches the database
+preload_app = True
+
+# above DB_STATEMENT_TIMEOUT_MS, so a slow query fails before the worker is killed
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# recycle workers now and then to bound memory growth, staggered by the jitter
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    from app import app
+    from pool import dispose_engines
+    dispose_engines(app)
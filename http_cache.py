@@ -0,0 +1,133 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+import pytz
+from flask import current_app, g, request, session, make_response
+from sqlalchemy import func, select
+from models import db, Venue, Artist, Show, TableDeletion
+from compression import etag_variant
+
+# ---------------------------------------------------------------------------- #
+# Conditional responses.
+# ---------------------------------------------------------------------------- #
+
+
+def make_etag(*parts):
+    # the salt changes the tag when templates change on deploy
+    raw = '|'.join([current_app.config.get('ETAG_SALT', '')] + [str(part) for part in parts])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def newest(*stamps):
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+def table_stamp(model):
+    return select(func.max(model.updated_at)).scalar_subquery()
+
+
+def deletion_stamp(model):
+    # deletes leave no updated_at behind; a trigger records them instead,
+    # read here by primary key
+    return select(TableDeletion.deleted_at).where(
+        TableDeletion.table_name == model.__tablename__).scalar_subquery()
+
+
+def venues_stamp():
+    # counters live on the venue row, so its stamp covers the counts too
+    updated_at, deleted_at = db.session.query(
+        table_stamp(Venue), deletion_stamp(Venue)).one()
+    return make_etag('venues', updated_at, deleted_at), newest(updated_at, deleted_at)
+
+
+def artists_stamp():
+    updated_at, deleted_at = db.session.query(
+        table_stamp(Artist), deletion_stamp(Artist)).one()
+    return make_etag('artists', updated_at, deleted_at), newest(updated_at, deleted_at)
+
+
+def shows_stamp():
+    show_stamp, venue_stamp, artist_stamp, deleted_at = db.session.query(
+        table_stamp(Show), table_stamp(Venue), table_stamp(Artist),
+        deletion_stamp(Show)).one()
+    return (make_etag('shows', show_stamp, venue_stamp, artist_stamp, deleted_at),
+            newest(show_stamp, venue_stamp, artist_stamp, deleted_at))
+
+
+def detail_stamp(model, entity_id, show_key, counterpart, counterpart_key):
+    """Stamp a detail page from the entity, its shows and their counterparts.
+
+    One grouped query over the entity's row and its (entity_id, start_time)
+    index range. The number of upcoming shows is part of the tag because
+    shows move from upcoming to past without any row changing.
+    """
+    now = datetime.now(pytz.UTC)
+    row = db.session.query(
+        model.updated_at,
+        func.max(Show.updated_at),
+        func.max(counterpart.updated_at),
+        func.count(Show.id),
+        func.count(Show.id).filter(Show.start_time > now)
+    ).outerjoin(Show, getattr(Show, show_key) == model.id).outerjoin(
+        counterpart, counterpart.id == getattr(Show, counterpart_key)).filter(
+        model.id == entity_id).group_by(model.id, model.updated_at).first()
+    if row is None:
+        return None
+    entity_stamp, show_stamp, counterpart_stamp, count, upcoming = row
+    return (make_etag(model.__tablename__, entity_id, entity_stamp, show_stamp,
+                      counterpart_stamp, count, upcoming),
+            newest(entity_stamp, show_stamp, counterpart_stamp))
+
+
+def venue_stamp(venue_id):
+    return detail_stamp(Venue, venue_id, 'venue_id', Artist, 'artist_id')
+
+
+def artist_stamp(artist_id):
+    return detail_stamp(Artist, artist_id, 'artist_id', Venue, 'venue_id')
+
+
+def not_modified(etag, last_modified):
+    if request.if_none_match:
+        # compressed responses carry the ETag with an encoding suffix
+        return any(request.if_none_match.contains(candidate) for candidate in (
+            etag, etag_variant(etag, 'gzip'), etag_variant(etag, 'br')))
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional(stamp):
+    """Answer If-None-Match / If-Modified-Since before the view runs.
+
+    stamp receives the view's arguments and returns (etag, last_modified),
+    or None to let the view handle the request (e.g. to 404). The ETag is
+    left in g.etag, where Cache.cached_page makes it part of the cache key,
+    so a cached body is only ever sent under the ETag it was rendered for.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            # pending flash messages make the page differ from its stamp
+            if request.method != 'GET' or '_flashes' in session:
+                return view(**kwargs)
+            result = stamp(**kwargs)
+            if result is None:
+                return view(**kwargs)
+            etag, last_modified = result
+            g.etag = etag
+
+            if not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(**kwargs))
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # shared caches may store the page but must revalidate it
+            response.cache_control.public = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
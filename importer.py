@@ -0,0 +1,306 @@
+import csv
+import io
+import json
+from datetime import timedelta
+import dateutil.parser
+import pytz
+from models import db, Venue, Artist, Show
+from counters import recount_show_counters
+from areas import sync_areas
+from cache import cache
+from bookings import DEFAULT_DURATION, batch_conflicts
+
+# ---------------------------------------------------------------------------- #
+# Bulk catalog import.
+# ---------------------------------------------------------------------------- #
+
+IMPORT_BATCH_SIZE = 5000
+
+VENUE_IMPORT_FIELDS = (
+    'name', 'city', 'state', 'address', 'phone', 'image_link', 'genres',
+    'facebook_link', 'website', 'seeking_talent', 'seeking_description'
+)
+
+ARTIST_IMPORT_FIELDS = (
+    'name', 'city', 'state', 'phone', 'image_link', 'genres',
+    'facebook_link', 'website', 'seeking_venue', 'seeking_description'
+)
+
+BOOLEAN_FIELDS = ('seeking_talent', 'seeking_venue')
+
+# show rows without a usable duration_minutes get DEFAULT_DURATION
+MAX_SHOW_MINUTES = 24 * 60
+
+
+class ImportReport:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.rejected = 0
+
+    def as_dict(self):
+        return {'read': self.read, 'inserted': self.inserted, 'rejected': self.rejected}
+
+
+def read_rows(stream, format):
+    """Yield (line number, row dict) from a text stream of CSV or JSONL.
+
+    CSV genres are comma-separated inside their cell. JSONL lines that are
+    not a JSON object are yielded as their raw text, for import_catalog to
+    reject.
+    """
+    if format == 'csv':
+        for line_number, row in enumerate(csv.DictReader(stream), start=2):
+            if row.get('genres'):
+                row['genres'] = [genre.strip() for genre in row['genres'].split(',')]
+            yield line_number, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_number, row if isinstance(row, dict) else line.rstrip('\r\n')
+
+
+def clean_row(row):
+    row = {key: (value.strip() if isinstance(value, str) else value)
+           for key, value in row.items()}
+    for field in BOOLEAN_FIELDS:
+        if isinstance(row.get(field), str):
+            row[field] = row[field].lower() in ('1', 'true', 'y', 'yes')
+    return row
+
+
+def validate(form_class, data):
+    # same rules as the web forms; formdata=None makes the form read `data`
+    # instead of the current request's body
+    form = form_class(formdata=None, data=data, meta={'csrf': False})
+    if form.validate():
+        return None
+    return form.errors
+
+
+# ---------------------------------------------------------------------------- #
+# Writers.
+# ---------------------------------------------------------------------------- #
+
+
+def copy_value(value):
+    if isinstance(value, (list, tuple)):
+        # Postgres array literal
+        return '{' + ','.join('"{}"'.format(
+            str(item).replace('\\', '\\\\').replace('"', '\\"')) for item in value) + '}'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def copy_field(value):
+    # COPY csv reads an unquoted empty field as NULL and a quoted one as '';
+    # the csv module cannot write that difference, so fields are built here
+    if value is None:
+        return ''
+    return '"{}"'.format(str(copy_value(value)).replace('"', '""'))
+
+
+def copy_rows(table, columns, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(','.join(copy_field(row[column]) for column in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert('COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+        table.name, ', '.join(columns)), buffer)
+
+
+def insert_rows(table, columns, rows, method):
+    if method == 'copy':
+        copy_rows(table, columns, rows)
+    else:
+        db.session.execute(table.insert(), rows)
+
+
+def supports_copy():
+    return hasattr(db.session.connection().connection.cursor(), 'copy_expert')
+
+
+# ---------------------------------------------------------------------------- #
+# Importers.
+# ---------------------------------------------------------------------------- #
+
+
+def lookup_external_ids(model, external_ids, known):
+    missing = [external_id for external_id in external_ids if external_id not in known]
+    if missing:
+        known.update(db.session.query(model.external_id, model.id).filter(
+            model.external_id.in_(missing)).all())
+    return known
+
+
+def existing_ids(model, ids):
+    ids = {int(entity_id) for entity_id in ids if str(entity_id).isdigit()}
+    if not ids:
+        return set()
+    return {row.id for row in db.session.query(model.id).filter(model.id.in_(ids))}
+
+
+def import_catalog(kind, rows, batch_size=IMPORT_BATCH_SIZE, method=None,
+                   on_reject=None, on_progress=None):
+    """Validate and insert venues, artists or shows from (line, row) pairs.
+
+    Rows are validated with VenueForm/ArtistForm/ShowForm and written in
+    batches with COPY when the driver supports it, otherwise with multi-row
+    INSERTs. Each batch commits on its own. Shows reference their venue and
+    artist either by id or by external id (venue_external_id /
+    artist_external_id). Venues and artists whose external id is already
+    taken are rejected, as are unreadable lines. Rejected rows go to
+    on_reject(line, row, errors).
+    """
+    from forms import VenueForm, ArtistForm, ShowForm
+
+    report = ImportReport()
+    method = method or ('copy' if supports_copy() else 'insert')
+    if kind == 'show':
+        table = Show.__table__
+        columns = ['venue_id', 'artist_id', 'start_time', 'duration_minutes']
+    else:
+        model = Venue if kind == 'venue' else Artist
+        table = model.__table__
+        form_class = VenueForm if kind == 'venue' else ArtistForm
+        fields = VENUE_IMPORT_FIELDS if kind == 'venue' else ARTIST_IMPORT_FIELDS
+        columns = list(fields) + ['external_id']
+
+    venue_ids = {}
+    artist_ids = {}
+    # external ids of the venues or artists being imported
+    catalog_ids = {}
+
+    def reject(line_number, row, errors):
+        report.rejected += 1
+        if on_reject:
+            on_reject(line_number, row, errors)
+
+    def prepare_shows(batch):
+        lookup_external_ids(Venue, {row['venue_external_id'] for line, row in batch
+                                    if row.get('venue_external_id')}, venue_ids)
+        lookup_external_ids(Artist, {row['artist_external_id'] for line, row in batch
+                                     if row.get('artist_external_id')}, artist_ids)
+        known_venues = existing_ids(Venue, [row.get('venue_id') for line, row in batch
+                                            if row.get('venue_id')])
+        known_artists = existing_ids(Artist, [row.get('artist_id') for line, row in batch
+                                              if row.get('artist_id')])
+        prepared = []
+        for line_number, row in batch:
+            if row.get('venue_id'):
+                venue_id = int(row['venue_id']) if str(row['venue_id']).isdigit() else None
+                venue_id = venue_id if venue_id in known_venues else None
+            else:
+                venue_id = venue_ids.get(row.get('venue_external_id'))
+            if row.get('artist_id'):
+                artist_id = int(row['artist_id']) if str(row['artist_id']).isdigit() else None
+                artist_id = artist_id if artist_id in known_artists else None
+            else:
+                artist_id = artist_ids.get(row.get('artist_external_id'))
+            try:
+                start_time = dateutil.parser.parse(str(row.get('start_time')))
+            except (ValueError, OverflowError):
+                start_time = None
+            errors = validate(ShowForm, {
+                'venue_id': str(venue_id or ''),
+                'artist_id': str(artist_id or ''),
+                'start_time': start_time
+            })
+            if not venue_id or not artist_id:
+                errors = dict(errors or {}, reference=['Unknown venue or artist'])
+            if errors:
+                reject(line_number, row, errors)
+                continue
+            if start_time.tzinfo is None:
+                start_time = start_time.replace(tzinfo=pytz.UTC)
+            duration = row.get('duration_minutes')
+            duration = int(duration) if str(duration or '').isdigit() else None
+            if duration is None or not 0 < duration <= MAX_SHOW_MINUTES:
+                duration = DEFAULT_DURATION // timedelta(minutes=1)
+            prepared.append((line_number, row, {
+                'venue_id': int(venue_id), 'artist_id': int(artist_id),
+                'start_time': start_time, 'duration_minutes': duration,
+                # only for the overlap check; the database sets end_time itself
+                'end_time': start_time + timedelta(minutes=duration)}))
+
+        # one overlapping row would fail the whole batch on the exclusion constraints
+        conflicts = batch_conflicts([show for line, row, show in prepared])
+        for position in sorted(conflicts):
+            line_number, row, show = prepared[position]
+            reject(line_number, row, {'start_time': ['Overlaps a show at this venue or by this artist']})
+        return [show for position, (line, row, show) in enumerate(prepared)
+                if position not in conflicts]
+
+    def prepare_catalog(batch):
+        # one duplicate external id would fail the whole batch on the unique
+        # constraint, so ids already in the table or earlier in the file are
+        # rejected as row errors; one IN lookup per batch
+        lookup_external_ids(model, {str(row['external_id']) for line, row in batch
+                                    if row.get('external_id')}, catalog_ids)
+        prepared = []
+        for line_number, row in batch:
+            data = {field: row.get(field) for field in fields}
+            errors = validate(form_class, data)
+            external_id = str(row['external_id']) if row.get('external_id') else None
+            if external_id is not None and external_id in catalog_ids:
+                errors = dict(errors or {}, external_id=['Duplicate external id'])
+            if errors:
+                reject(line_number, row, errors)
+                continue
+            if external_id is not None:
+                # claimed by this row; its id is not known until it is written
+                catalog_ids[external_id] = None
+            data['external_id'] = external_id
+            prepared.append(data)
+        return prepared
+
+    def flush(batch):
+        prepared = prepare_shows(batch) if kind == 'show' else prepare_catalog(batch)
+        if prepared:
+            insert_rows(table, columns, prepared, method)
+            if kind == 'show':
+                # bulk writes bypass the ORM counter events
+                touched_venues = {row['venue_id'] for row in prepared}
+                touched_artists = {row['artist_id'] for row in prepared}
+                recount_show_counters(touched_venues, touched_artists)
+            db.session.commit()
+            if kind == 'show':
+                cache.invalidate(*['venue:{}'.format(venue_id) for venue_id in touched_venues])
+                cache.invalidate(*['artist:{}'.format(artist_id) for artist_id in touched_artists])
+            report.inserted += len(prepared)
+        if on_progress:
+            on_progress(report)
+
+    batch = []
+    try:
+        for line_number, row in rows:
+            report.read += 1
+            if not isinstance(row, dict):
+                reject(line_number, row, {'row': ['Not a JSON object']})
+                continue
+            batch.append((line_number, clean_row(row)))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        if kind != 'show' and report.inserted:
+            # bulk writes bypass the ORM events that assign areas too
+            sync_areas()
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        cache.invalidate('venues', 'artists', 'shows')
+        if kind != 'show':
+            cache.invalidate('{}_genres'.format(kind))
+        db.session.close()
+    return report
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import defaultdict
+from flask import current_app, g, request, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ---------------------------------------------------------------------------- #
+# Request metrics.
+# ---------------------------------------------------------------------------- #
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        # Prometheus buckets are cumulative, which observe() already keeps
+        for bound, count in zip(self.buckets, self.counts):
+            yield '{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, count)
+        yield '{}_bucket{{{},le="+Inf"}} {}'.format(name, labels, self.total)
+        yield '{}_sum{{{}}} {}'.format(name, labels, self.sum)
+        yield '{}_count{{{}}} {}'.format(name, labels, self.total)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_statement(connection, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'sql_count' in g:
+        g.sql_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def finish_statement(connection, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'sql_count' in g:
+        g.sql_count += 1
+        g.sql_time += time.perf_counter() - g.pop('sql_started', time.perf_counter())
+
+
+class Metrics:
+    """Per-route latency and SQL usage, kept in this worker's memory.
+
+    Each gunicorn worker keeps its own numbers; Prometheus tells them apart
+    by scrape target, or they can be summed across instances.
+    """
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))
+        self.sql_seconds = defaultdict(float)
+        self.over_budget = defaultdict(int)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.extensions['metrics'] = self
+
+    def start_request(self):
+        g.request_started = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+
+    def finish_request(self, response):
+        # streamed bodies are still being generated at this point, so their
+        # latency covers the time to first byte
+        if 'request_started' not in g:
+            return response
+        elapsed = time.perf_counter() - g.request_started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        labels = 'route="{}",method="{}"'.format(route, request.method)
+
+        budget = current_app.config.get('SQL_QUERY_BUDGET')
+        exceeded = budget is not None and g.sql_count > budget
+        if exceeded:
+            current_app.logger.warning(
+                '%s %s issued %d SQL statements (budget %d) in %.1f ms',
+                request.method, request.full_path, g.sql_count, budget, g.sql_time * 1000)
+
+        with self.lock:
+            self.latency[labels].observe(elapsed)
+            self.statements[labels].observe(g.sql_count)
+            self.sql_seconds[labels] += g.sql_time
+            if exceeded:
+                self.over_budget[labels] += 1
+
+        if current_app.config.get('METRICS_HEADERS'):
+            response.headers['X-SQL-Count'] = str(g.sql_count)
+            response.headers['X-SQL-Time-Ms'] = '{:.2f}'.format(g.sql_time * 1000)
+            response.headers['Server-Timing'] = 'sql;dur={:.2f};desc="{} statements", app;dur={:.2f}'.format(
+                g.sql_time * 1000, g.sql_count, elapsed * 1000)
+        return response
+
+    def render(self, pools=None):
+        """Prometheus text exposition of everything recorded so far.
+
+        pools maps an engine name to its pool_stats() dict.
+        """
+        lines = [
+            '# HELP fyyur_request_duration_seconds Request latency by route.',
+            '# TYPE fyyur_request_duration_seconds histogram',
+        ]
+        with self.lock:
+            for labels, histogram in sorted(self.latency.items()):
+                lines.extend(histogram.lines('fyyur_request_duration_seconds', labels))
+            lines += [
+                '# HELP fyyur_request_sql_statements SQL statements issued per request.',
+                '# TYPE fyyur_request_sql_statements histogram',
+            ]
+            for labels, histogram in sorted(self.statements.items()):
+                lines.extend(histogram.lines('fyyur_request_sql_statements', labels))
+            lines += [
+                '# HELP fyyur_request_sql_seconds_total Time spent in SQL by route.',
+                '# TYPE fyyur_request_sql_seconds_total counter',
+            ]
+            for labels, seconds in sorted(self.sql_seconds.items()):
+                lines.append('fyyur_request_sql_seconds_total{{{}}} {}'.format(labels, seconds))
+            lines += [
+                '# HELP fyyur_request_over_query_budget_total Requests above SQL_QUERY_BUDGET.',
+                '# TYPE fyyur_request_over_query_budget_total counter',
+            ]
+            for labels, count in sorted(self.over_budget.items()):
+                lines.append('fyyur_request_over_query_budget_total{{{}}} {}'.format(labels, count))
+
+        for engine_name, stats in sorted((pools or {}).items()):
+            for key, value in sorted(stats.items()):
+                if isinstance(value, (int, float)):
+                    lines.append('fyyur_db_pool_{}{{engine="{}"}} {}'.format(key, engine_name, value))
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,28 @@
+"""state/city indexes
+
+Revision ID: 0a9e4d2c7f16
+Revises: f3c81b6a0e52
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0a9e4d2c7f16'
+down_revision = 'f3c81b6a0e52'
+branch_labels = None
+depends_on = None
+
+TABLES = ('venue', 'artist')
+
+
+def upgrade():
+    for table in TABLES:
+        op.create_index('ix_{}_state_city'.format(table), table,
+                        ['state', 'city'], unique=False)
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index('ix_{}_state_city'.format(table), table_name=table)
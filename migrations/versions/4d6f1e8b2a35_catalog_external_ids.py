@@ -0,0 +1,32 @@
+"""catalog external ids
+
+Revision ID: 4d6f1e8b2a35
+Revises: 0a9e4d2c7f16
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '4d6f1e8b2a35'
+down_revision = '0a9e4d2c7f16'
+branch_labels = None
+depends_on = None
+
+TABLES = ('venue', 'artist')
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column(
+            'external_id', sa.String(length=120), nullable=True))
+        op.create_unique_constraint('{}_external_id_key'.format(table),
+                                    table, ['external_id'])
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_constraint('{}_external_id_key'.format(table), table,
+                           type_='unique')
+        op.drop_column(table, 'external_id')
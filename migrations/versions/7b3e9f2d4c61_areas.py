@@ -0,0 +1,69 @@
+"""areas
+
+Revision ID: 7b3e9f2d4c61
+Revises: 4d6f1e8b2a35
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '7b3e9f2d4c61'
+down_revision = '4d6f1e8b2a35'
+branch_labels = None
+depends_on = None
+
+TABLES = (('venue', 'venue_count'), ('artist', 'artist_count'))
+
+# same normalization as areas.city_name() and areas.city_key()
+CITY_NAME = r"btrim(regexp_replace({0}.city, '\s+', ' ', 'g'))"
+CITY_KEY = 'lower({})'.format(CITY_NAME)
+
+
+def upgrade():
+    op.create_table(
+        'area',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('state', sa.String(length=120), nullable=False),
+        sa.Column('city_key', sa.String(length=120), nullable=False),
+        sa.Column('city', sa.String(length=120), nullable=False),
+        sa.Column('venue_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('artist_count', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('state', 'city_key', name='uq_area_state_city_key'),
+    )
+    for table, _ in TABLES:
+        op.add_column(table, sa.Column('area_id', sa.Integer(), nullable=True))
+
+    # backfill: one area per state and normalized city, then link and count
+    for table, _ in TABLES:
+        op.execute(
+            "INSERT INTO area (state, city_key, city) "
+            "SELECT state, {key}, min({name}) "
+            "FROM {table} WHERE state IS NOT NULL AND {name} <> '' "
+            "GROUP BY state, {key} "
+            "ON CONFLICT (state, city_key) DO NOTHING".format(
+                table=table, key=CITY_KEY.format(table), name=CITY_NAME.format(table)))
+        op.execute(
+            "UPDATE {table} SET area_id = area.id FROM area "
+            "WHERE area.state = {table}.state AND area.city_key = {key}".format(
+                table=table, key=CITY_KEY.format(table)))
+    for table, counter in TABLES:
+        op.execute(
+            "UPDATE area SET {counter} = "
+            "(SELECT count(*) FROM {table} WHERE {table}.area_id = area.id)".format(
+                table=table, counter=counter))
+
+    for table, _ in TABLES:
+        op.create_foreign_key('{}_area_id_fkey'.format(table), table, 'area',
+                              ['area_id'], ['id'])
+        op.create_index('ix_{}_area_id'.format(table), table, ['area_id'], unique=False)
+
+
+def downgrade():
+    for table, _ in TABLES:
+        op.drop_index('ix_{}_area_id'.format(table), table_name=table)
+        op.drop_constraint('{}_area_id_fkey'.format(table), table, type_='foreignkey')
+        op.drop_column(table, 'area_id')
+    op.drop_table('area')
@@ -0,0 +1,70 @@
+"""typed, indexed show start_time
+
+Revision ID: 8c4e2a9f61d3
+Revises: 3a1f0c7d2b10
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2a9f61d3'
+down_revision = '3a1f0c7d2b10'
+branch_labels = None
+depends_on = None
+
+# rows converted per UPDATE; each batch commits on its own
+BATCH_SIZE = 10000
+
+
+def convert_in_batches(expression):
+    """Fill start_time_new from start_time without holding a lock on show.
+
+    add_column's ACCESS EXCLUSIVE lock is released by committing before the
+    batches, and every batch is its own transaction, so the app keeps
+    reading and writing meanwhile. Rows written during the batches are
+    caught up afterwards under a short table lock, ahead of the swap.
+    """
+    update = ('UPDATE show SET start_time_new = {} '
+              'WHERE start_time_new IS NULL'.format(expression))
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        low, high = connection.execute(
+            sa.text('SELECT min(id), max(id) FROM show')).fetchone()
+        if low is not None:
+            for start in range(low, high + 1, BATCH_SIZE):
+                connection.execute(sa.text(update + ' AND id >= :start AND id < :stop'),
+                                   {'start': start, 'stop': start + BATCH_SIZE})
+    # back in the migration transaction, which holds the lock until commit
+    op.execute('LOCK TABLE show IN ACCESS EXCLUSIVE MODE')
+    op.execute(update)
+
+
+def upgrade():
+    # naive strings such as form submissions are read as UTC; a session
+    # setting, as the batches run outside the migration transaction
+    op.execute("SET TIME ZONE 'UTC'")
+    op.add_column('show', sa.Column(
+        'start_time_new', sa.DateTime(timezone=True), nullable=True))
+    convert_in_batches('start_time::timestamptz')
+    op.drop_column('show', 'start_time')
+    op.alter_column('show', 'start_time_new',
+                    new_column_name='start_time', nullable=False)
+    op.create_index('ix_show_venue_id_start_time', 'show',
+                    ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_artist_id_start_time', 'show',
+                    ['artist_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    op.execute("SET TIME ZONE 'UTC'")
+    op.drop_index('ix_show_artist_id_start_time', table_name='show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='show')
+    op.add_column('show', sa.Column(
+        'start_time_new', sa.String(length=120), nullable=True))
+    convert_in_batches(
+        """to_char(start_time, 'YYYY-MM-DD"T"HH24:MI:SS.MS"Z"')""")
+    op.drop_column('show', 'start_time')
+    op.alter_column('show', 'start_time_new',
+                    new_column_name='start_time', nullable=False)
@@ -0,0 +1,48 @@
+"""table deletion stamps
+
+Revision ID: a4e7c1b9d205
+Revises: c8d2f5a71e09
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a4e7c1b9d205'
+down_revision = 'c8d2f5a71e09'
+branch_labels = None
+depends_on = None
+
+TABLES = ('venue', 'artist', 'show')
+
+
+def upgrade():
+    op.create_table('table_deletion',
+    sa.Column('table_name', sa.String(length=63), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+    # per statement rather than per row, and in the database so bulk
+    # deletes and TRUNCATE are stamped too
+    op.execute("""
+        CREATE FUNCTION stamp_table_deletion() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_deletion (table_name, deleted_at)
+            VALUES (TG_TABLE_NAME, clock_timestamp())
+            ON CONFLICT (table_name) DO UPDATE SET deleted_at = excluded.deleted_at;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute('CREATE TRIGGER {0}_table_deletion AFTER DELETE OR TRUNCATE ON {0} '
+                   'FOR EACH STATEMENT EXECUTE PROCEDURE stamp_table_deletion()'.format(table))
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute('DROP TRIGGER {0}_table_deletion ON {0}'.format(table))
+    op.execute('DROP FUNCTION stamp_table_deletion()')
+    op.drop_table('table_deletion')
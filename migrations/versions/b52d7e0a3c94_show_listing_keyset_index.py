@@ -0,0 +1,24 @@
+"""show listing keyset index
+
+Revision ID: b52d7e0a3c94
+Revises: 8c4e2a9f61d3
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b52d7e0a3c94'
+down_revision = '8c4e2a9f61d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_show_start_time_id', 'show',
+                    ['start_time', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_show_start_time_id', table_name='show')
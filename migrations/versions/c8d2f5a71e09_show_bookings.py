@@ -0,0 +1,93 @@
+"""show durations and booking exclusion constraints
+
+Revision ID: c8d2f5a71e09
+Revises: 7b3e9f2d4c61
+Create Date: 2026-10-18 13:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c8d2f5a71e09'
+down_revision = '7b3e9f2d4c61'
+branch_labels = None
+depends_on = None
+
+# rows backfilled per UPDATE; each batch commits on its own
+BATCH_SIZE = 10000
+
+OWNERS = (('venue_id', 'show_venue_no_overlap'), ('artist_id', 'show_artist_no_overlap'))
+
+
+def backfill_end_time():
+    """Fill end_time without holding a lock on show.
+
+    add_column's ACCESS EXCLUSIVE lock is released by committing before the
+    batches, and every batch is its own transaction. Rows written during the
+    batches are caught up afterwards under a short table lock, which the
+    migration keeps while it adds the trigger and the constraints.
+    """
+    update = ('UPDATE show SET end_time = start_time + make_interval(mins => duration_minutes) '
+              'WHERE end_time IS NULL')
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        low, high = connection.execute(
+            sa.text('SELECT min(id), max(id) FROM show')).fetchone()
+        if low is not None:
+            for start in range(low, high + 1, BATCH_SIZE):
+                connection.execute(sa.text(update + ' AND id >= :start AND id < :stop'),
+                                   {'start': start, 'stop': start + BATCH_SIZE})
+    op.execute('LOCK TABLE show IN ACCESS EXCLUSIVE MODE')
+    op.execute(update)
+
+
+def check_overlaps(owner):
+    # an exclusion constraint cannot be added NOT VALID, so existing double
+    # bookings have to be resolved by hand first. A show overlaps when it
+    # starts before the latest end among the shows that started before it.
+    rows = op.get_bind().execute(sa.text(
+        'SELECT id, {0} FROM (SELECT id, {0}, start_time, max(end_time) OVER ('
+        'PARTITION BY {0} ORDER BY start_time, id '
+        'ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS previous_end FROM show) s '
+        'WHERE start_time < previous_end LIMIT 20'.format(owner))).fetchall()
+    if rows:
+        raise RuntimeError('Shows overlapping an earlier show with the same {}: {} - move or '
+                           'shorten them and run the upgrade again'.format(
+                               owner, ', '.join('{} ({}={})'.format(row[0], owner, row[1])
+                                                for row in rows)))
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.add_column('show', sa.Column('duration_minutes', sa.Integer(),
+                                    server_default='120', nullable=False))
+    op.add_column('show', sa.Column('end_time', sa.DateTime(timezone=True), nullable=True))
+    backfill_end_time()
+    op.alter_column('show', 'end_time', nullable=False)
+
+    # computed here rather than by the app so COPY and raw SQL get it too
+    op.execute("""
+        CREATE FUNCTION show_set_end_time() RETURNS trigger AS $$
+        BEGIN
+            NEW.end_time := NEW.start_time + make_interval(mins => NEW.duration_minutes);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute('CREATE TRIGGER show_set_end_time BEFORE INSERT OR UPDATE ON show '
+               'FOR EACH ROW EXECUTE PROCEDURE show_set_end_time()')
+
+    for owner, name in OWNERS:
+        check_overlaps(owner)
+        op.execute('ALTER TABLE show ADD CONSTRAINT {} EXCLUDE USING gist '
+                   '({} WITH =, tstzrange(start_time, end_time) WITH &&)'.format(name, owner))
+
+
+def downgrade():
+    for owner, name in OWNERS:
+        op.drop_constraint(name, 'show')
+    op.execute('DROP TRIGGER show_set_end_time ON show')
+    op.execute('DROP FUNCTION show_set_end_time()')
+    op.drop_column('show', 'end_time')
+    op.drop_column('show', 'duration_minutes')
@@ -0,0 +1,40 @@
+"""search indexes
+
+Revision ID: d17a5c3e9b28
+Revises: b52d7e0a3c94
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd17a5c3e9b28'
+down_revision = 'b52d7e0a3c94'
+branch_labels = None
+depends_on = None
+
+TABLES = ('venue', 'artist')
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in TABLES:
+        op.create_index('ix_{}_name_trgm'.format(table), table, ['name'],
+                        postgresql_using='gin',
+                        postgresql_ops={'name': 'gin_trgm_ops'})
+        op.create_index('ix_{}_city_trgm'.format(table), table, ['city'],
+                        postgresql_using='gin',
+                        postgresql_ops={'city': 'gin_trgm_ops'})
+        op.create_index('ix_{}_genres'.format(table), table, ['genres'],
+                        postgresql_using='gin')
+        op.create_index('ix_{}_name_prefix'.format(table), table,
+                        [sa.text('lower(name) text_pattern_ops')])
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index('ix_{}_name_prefix'.format(table), table_name=table)
+        op.drop_index('ix_{}_genres'.format(table), table_name=table)
+        op.drop_index('ix_{}_city_trgm'.format(table), table_name=table)
+        op.drop_index('ix_{}_name_trgm'.format(table), table_name=table)
@@ -0,0 +1,27 @@
+"""show counter watermark
+
+Revision ID: e6b90d4f15a7
+Revises: d17a5c3e9b28
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e6b90d4f15a7'
+down_revision = 'd17a5c3e9b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('show_counter_watermark',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rolled_over_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('show_counter_watermark')
@@ -1,7 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import FetchedValue
 from enums import Genres
+from routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # ---------------------------------------------------------------------------- #
 # Models.
@@ -16,7 +19,7 @@ class Venue(db.Model):
     city = db.Column(db.String(120))
     facebook_link = db.Column(db.String(120), nullable=True)
     image_link = db.Column(db.String(500))
-    genres = db.Column(db.ARRAY(db.String), default=[Genres.pop])
+    genres = db.Column(postgresql.ARRAY(db.String), default=[Genres.pop])
     name = db.Column(db.String)
     phone = db.Column(db.String(120))
     seeking_description = db.Column(
@@ -24,8 +27,12 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean, nullable=True, default=False)
     state = db.Column(db.String(120))
     website = db.Column(db.String(500))
+    external_id = db.Column(db.String(120), unique=True, nullable=True)
+    area_id = db.Column(db.Integer, db.ForeignKey('area.id'), nullable=True, index=True)
     num_upcoming_shows = db.Column(db.Integer, default=0)
     num_past_shows = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True,
+                           server_default=db.func.now(), onupdate=db.func.now())
     shows = db.relationship('Show', backref='venue')
 
     def __repr__(self):
@@ -38,7 +45,7 @@ class Artist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     city = db.Column(db.String(120))
     facebook_link = db.Column(db.String(120), nullable=True)
-    genres = db.Column(db.ARRAY(db.String), default=[Genres.pop])
+    genres = db.Column(postgresql.ARRAY(db.String), default=[Genres.pop])
     image_link = db.Column(db.String(500))
     name = db.Column(db.String)
     phone = db.Column(db.String(120))
@@ -46,8 +53,12 @@ class Artist(db.Model):
     seeking_venue = db.Column(db.Boolean, nullable=True)
     state = db.Column(db.String(120))
     website = db.Column(db.String(500))
+    external_id = db.Column(db.String(120), unique=True, nullable=True)
+    area_id = db.Column(db.Integer, db.ForeignKey('area.id'), nullable=True, index=True)
     upcoming_shows_count = db.Column(db.Integer, default=0)
     past_shows_count = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True,
+                           server_default=db.func.now(), onupdate=db.func.now())
     shows = db.relationship('Show', backref='artist')
 
     def __repr__(self):
@@ -56,12 +67,105 @@ class Artist(db.Model):
 
 class Show(db.Model):
     __tablename__ = 'show'
+    __table_args__ = (
+        # past/upcoming lookups are range scans over one venue's or artist's shows
+        db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+        # keyset pagination of the /shows listing
+        db.Index('ix_show_start_time_id', 'start_time', 'id'),
+        # no double bookings; the GiST indexes behind these also answer
+        # overlap queries for one venue or artist (needs btree_gist)
+        postgresql.ExcludeConstraint(
+            ('venue_id', '='), (db.literal_column('tstzrange(start_time, end_time)'), '&&'),
+            using='gist', name='show_venue_no_overlap'),
+        postgresql.ExcludeConstraint(
+            ('artist_id', '='), (db.literal_column('tstzrange(start_time, end_time)'), '&&'),
+            using='gist', name='show_artist_no_overlap'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     venue_id = db.Column(db.Integer, db.ForeignKey(
         'venue.id'), nullable=False)
     artist_id = db.Column(db.ForeignKey('artist.id'), nullable=False)
-    start_time = db.Column(db.String(120), nullable=False)
+    start_time = db.Column(db.DateTime(timezone=True), nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False, default=120, server_default='120')
+    # start_time + duration, set by the show_set_end_time trigger on every
+    # write, COPY included
+    end_time = db.Column(db.DateTime(timezone=True), nullable=False,
+                         server_default=FetchedValue(), server_onupdate=FetchedValue())
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True,
+                           server_default=db.func.now(), onupdate=db.func.now())
 
     def __repr__(self):
         return f'< Show id: {self.id} venue: {self.venue_id} artist: {self.artist_id} time: {self.start_time} >'
+
+
+class ShowCounterWatermark(db.Model):
+    # single row: shows starting at or before rolled_over_at are counted as past
+    __tablename__ = 'show_counter_watermark'
+
+    id = db.Column(db.Integer, primary_key=True)
+    rolled_over_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f'< ShowCounterWatermark rolled_over_at: {self.rolled_over_at} >'
+
+
+class TableDeletion(db.Model):
+    # one row per table: when rows were last deleted from it, written by the
+    # table_deletion triggers so listing ETags change on deletes
+    __tablename__ = 'table_deletion'
+
+    table_name = db.Column(db.String(63), primary_key=True)
+    deleted_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f'< TableDeletion {self.table_name} deleted_at: {self.deleted_at} >'
+
+
+class Area(db.Model):
+    # one row per state and normalized city, kept in sync by areas.py
+    __tablename__ = 'area'
+    __table_args__ = (
+        db.UniqueConstraint('state', 'city_key', name='uq_area_state_city_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    state = db.Column(db.String(120), nullable=False)
+    # lower-cased city with runs of whitespace collapsed
+    city_key = db.Column(db.String(120), nullable=False)
+    # spelling shown in listings, from the first venue or artist seen
+    city = db.Column(db.String(120), nullable=False)
+    venue_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    artist_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f'< Area {self.city}, {self.state} venues: {self.venue_count} artists: {self.artist_count} >'
+
+
+# ---------------------------------------------------------------------------- #
+# Search indexes.
+# ---------------------------------------------------------------------------- #
+
+def search_indexes(model):
+    table = model.__tablename__
+    return (
+        # substring matches on name and city (pg_trgm)
+        db.Index('ix_{}_name_trgm'.format(table), model.name,
+                 postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_{}_city_trgm'.format(table), model.city,
+                 postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'}),
+        # genre overlap/containment
+        db.Index('ix_{}_genres'.format(table), model.genres,
+                 postgresql_using='gin'),
+        # city/state filters and area grouping
+        db.Index('ix_{}_state_city'.format(table), model.state, model.city),
+        # autocomplete prefix matches
+        db.Index('ix_{}_name_prefix'.format(table),
+                 db.func.lower(model.name).label('name_lower'),
+                 postgresql_ops={'name_lower': 'text_pattern_ops'}),
+    )
+
+
+venue_search_indexes = search_indexes(Venue)
+artist_search_indexes = search_indexes(Artist)
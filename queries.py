@@ -0,0 +1,140 @@
+import base64
+from datetime import datetime
+import dateutil.parser
+import pytz
+from flask import abort
+from sqlalchemy import tuple_
+from models import db, Venue, Artist, Show
+
+# ---------------------------------------------------------------------------- #
+# Detail page loaders.
+# ---------------------------------------------------------------------------- #
+
+VENUE_DETAIL_FIELDS = (
+    'id', 'name', 'genres', 'address', 'city', 'state', 'phone', 'website',
+    'facebook_link', 'seeking_talent', 'seeking_description', 'image_link'
+)
+
+ARTIST_DETAIL_FIELDS = (
+    'id', 'name', 'genres', 'city', 'state', 'phone', 'website',
+    'facebook_link', 'seeking_venue', 'seeking_description', 'image_link'
+)
+
+
+def load_detail(model, entity_id, fields, show_key, counterpart, counterpart_key):
+    """Load one venue or artist plus its shows in two queries.
+
+    Shows come back as plain dicts carrying the counterpart's id, name and
+    image link (e.g. 'artist_name' on a venue page), already split into
+    upcoming and past. Aborts with 404 when the entity does not exist.
+    """
+    entity = db.session.query(
+        *[getattr(model, field) for field in fields]
+    ).filter(model.id == entity_id).first()
+    if entity is None:
+        abort(404)
+
+    prefix = counterpart.__tablename__
+    counterpart_id = getattr(Show, counterpart_key)
+    shows = db.session.query(
+        counterpart_id.label(prefix + '_id'),
+        counterpart.name.label(prefix + '_name'),
+        counterpart.image_link.label(prefix + '_image_link'),
+        Show.start_time
+    ).join(counterpart, counterpart.id == counterpart_id).filter(
+        getattr(Show, show_key) == entity_id).order_by(Show.start_time).all()
+
+    now = datetime.now(pytz.UTC)
+    upcoming_shows = []
+    past_shows = []
+    for show in shows:
+        if show.start_time > now:
+            upcoming_shows.append(show._asdict())
+        else:
+            past_shows.append(show._asdict())
+
+    data = entity._asdict()
+    data.update({
+        "upcoming_shows": upcoming_shows,
+        "upcoming_shows_count": len(upcoming_shows),
+        "past_shows": past_shows,
+        "past_shows_count": len(past_shows)
+    })
+    return data
+
+
+def load_venue_detail(venue_id):
+    return load_detail(Venue, venue_id, VENUE_DETAIL_FIELDS,
+                       'venue_id', Artist, 'artist_id')
+
+
+def load_artist_detail(artist_id):
+    return load_detail(Artist, artist_id, ARTIST_DETAIL_FIELDS,
+                       'artist_id', Venue, 'venue_id')
+
+
+# ---------------------------------------------------------------------------- #
+# Show listing.
+# ---------------------------------------------------------------------------- #
+
+
+def encode_show_cursor(start_time, show_id):
+    raw = '{}|{}'.format(start_time.isoformat(), show_id)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_show_cursor(cursor):
+    try:
+        start_time, show_id = base64.urlsafe_b64decode(
+            cursor.encode()).decode().split('|')
+        return dateutil.parser.parse(start_time), int(show_id)
+    except (ValueError, UnicodeDecodeError):
+        abort(400)
+
+
+SHOW_LISTING_COLUMNS = {
+    'id': Show.id,
+    'start_time': Show.start_time,
+    'end_time': Show.end_time,
+    'venue_id': Show.venue_id,
+    'venue_name': Venue.name.label('venue_name'),
+    'artist_id': Show.artist_id,
+    'artist_name': Artist.name.label('artist_name'),
+    'artist_image_link': Artist.image_link.label('artist_image_link'),
+}
+
+
+def shows_listing_query(cursor=None, fields=None):
+    """Shows ordered by (start_time, id), projected to the tile columns.
+
+    fields narrows the projection to a subset of SHOW_LISTING_COLUMNS. With a
+    cursor from encode_show_cursor, resumes strictly after that show, so each
+    page is an index seek rather than an OFFSET scan.
+    """
+    fields = fields or SHOW_LISTING_COLUMNS.keys()
+    query = db.session.query(
+        *[SHOW_LISTING_COLUMNS[field] for field in fields]
+    ).select_from(Show)
+    if 'venue_name' in fields:
+        query = query.join(Venue, Venue.id == Show.venue_id)
+    if 'artist_name' in fields or 'artist_image_link' in fields:
+        query = query.join(Artist, Artist.id == Show.artist_id)
+    if cursor:
+        after = decode_show_cursor(cursor)
+        query = query.filter(tuple_(Show.start_time, Show.id) > after)
+    return query.order_by(Show.start_time, Show.id)
+
+
+def load_shows_page(cursor=None, per_page=100):
+    rows = shows_listing_query(cursor).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_show_cursor(last.start_time, last.id)
+    return rows, next_cursor
+
+
+def stream_shows(cursor=None, batch_size=1000):
+    # yield_per fetches through a server-side cursor in batch_size chunks
+    return shows_listing_query(cursor).yield_per(batch_size)
@@ -0,0 +1,163 @@
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app
+from sqlalchemy import event
+from cache import NullBackend
+from models import db, Venue, Artist, Show
+
+try:
+    import pytest
+except ImportError:  # only needed when loaded as a pytest plugin
+    pytest = None
+
+# ---------------------------------------------------------------------------- #
+# SQL query budgets.
+# ---------------------------------------------------------------------------- #
+
+# Statements a cold request may issue, whatever the size of the catalog; a
+# lazy load in a template shows up as a count that grows with the data.
+# Listing and detail pages spend one statement on their ETag stamp, listings
+# one more on genre facets (normally cached).
+ROUTE_BUDGETS = {
+    '/venues': 3,
+    '/artists': 3,
+    '/shows': 2,
+    '/venues/<id>': 3,
+    '/artists/<id>': 3,
+    '/api/venues': 1,
+    '/api/shows': 1,
+    '/api/venues/<id>': 2,
+    '/api/artists/<id>': 2,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def record(self, connection, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def check(self, budget, label='request'):
+        if self.count > budget:
+            raise QueryBudgetExceeded('{} issued {} SQL statements, budget is {}:\n{}'.format(
+                label, self.count, budget, '\n'.join(
+                    '  {}. {}'.format(index, ' '.join(statement.split()))
+                    for index, statement in enumerate(self.statements, 1))))
+
+
+@contextmanager
+def count_queries(cold=True):
+    """Count SQL statements sent on the app's engines inside the block.
+
+    With cold, the page cache is bypassed so cached views do their real work.
+    """
+    counter = QueryCounter()
+    # the primary and any read replicas
+    engines = list((getattr(db, 'engines', None) or {None: db.engine}).values())
+    cache = current_app.extensions.get('cache')
+    backend = cache.backend if cache else None
+    if cold and cache:
+        cache.backend = NullBackend()
+    for engine in engines:
+        event.listen(engine, 'after_cursor_execute', counter.record)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, 'after_cursor_execute', counter.record)
+        if cache:
+            cache.backend = backend
+
+
+def request_query_count(client, path, cold=True):
+    """Return (response, counter) for a GET through the test client."""
+    with count_queries(cold=cold) as counter:
+        response = client.get(path)
+        response.get_data()
+    return response, counter
+
+
+def query_budget(budget):
+    """Fail the decorated test if it issues more than `budget` statements.
+
+    The test runs inside an app context, e.g. via the `app` fixture.
+    """
+    def decorator(test):
+        @wraps(test)
+        def wrapper(*args, **kwargs):
+            with count_queries() as counter:
+                result = test(*args, **kwargs)
+            counter.check(budget, test.__name__)
+            return result
+        return wrapper
+    return decorator
+
+
+def budget_paths():
+    """ROUTE_BUDGETS with <id> filled in from existing rows."""
+    ids = {
+        'venue': db.session.query(db.func.min(Venue.id)).scalar(),
+        'artist': db.session.query(db.func.min(Artist.id)).scalar(),
+        'show': db.session.query(db.func.min(Show.id)).scalar(),
+    }
+    for route, budget in ROUTE_BUDGETS.items():
+        kind = route.split('/')[-2].rstrip('s') if route.endswith('<id>') else None
+        if kind and ids[kind] is None:
+            continue
+        yield route, route.replace('<id>', str(ids[kind])) if kind else route, budget
+
+
+def check_route_budgets(app):
+    """Request every budgeted route; return a list of (route, count, budget, error)."""
+    results = []
+    with app.app_context():
+        paths = list(budget_paths())
+        client = app.test_client()
+        for route, path, budget in paths:
+            response, counter = request_query_count(client, path)
+            error = None
+            if response.status_code != 200:
+                error = 'status {}'.format(response.status_code)
+            else:
+                try:
+                    counter.check(budget, path)
+                except QueryBudgetExceeded as exc:
+                    error = str(exc)
+            results.append((route, counter.count, budget, error))
+    return results
+
+
+# ---------------------------------------------------------------------------- #
+# pytest fixtures: import them into a conftest.py that defines `app`, as
+# tests/conftest.py does.
+# ---------------------------------------------------------------------------- #
+
+if pytest is not None:
+
+    @pytest.fixture
+    def query_counter(app):
+        """Counts the statements issued during a test; needs an `app` fixture."""
+        with app.app_context():
+            with count_queries() as counter:
+                yield counter
+
+    @pytest.fixture
+    def assert_query_budget(app):
+        """assert_query_budget('/venues', 3) -> response, failing over budget."""
+        client = app.test_client()
+
+        def check(path, budget=None):
+            with app.app_context():
+                response, counter = request_query_count(client, path)
+            counter.check(ROUTE_BUDGETS[path] if budget is None else budget, path)
+            return response
+        return check
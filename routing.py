@@ -0,0 +1,74 @@
+import random
+from flask import g, request, has_request_context, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# ---------------------------------------------------------------------------- #
+# Read replicas.
+# ---------------------------------------------------------------------------- #
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+# GET endpoints that write, or must see every write
+PRIMARY_ENDPOINTS = {'main.delete_venue'}
+
+# cookie that keeps a client on the primary for a while after it wrote; a
+# plain cookie rather than the session, so reading it adds no Vary: Cookie
+PRIMARY_COOKIE = 'read_primary'
+
+
+def replica_binds(config):
+    """SQLALCHEMY_BINDS entries for the REPLICA_DATABASE_URLS setting."""
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    for index, url in enumerate(config.get('REPLICA_DATABASE_URLS') or ()):
+        binds['{}{}'.format(REPLICA_BIND_PREFIX, index)] = url
+    return binds
+
+
+def replica_keys(engines):
+    return sorted(key for key in engines if key and key.startswith(REPLICA_BIND_PREFIX))
+
+
+def reads_from_replica():
+    if not has_request_context() or request.method not in ('GET', 'HEAD'):
+        return False
+    endpoint = request.endpoint or ''
+    if endpoint in PRIMARY_ENDPOINTS or endpoint.endswith('_submission'):
+        return False
+    if g.get('wrote_to_primary'):
+        return False
+    # read-your-writes: the redirect after a form post, and a few seconds
+    # after that, read what was just written
+    return PRIMARY_COOKIE not in request.cookies
+
+
+class RoutingSession(Session):
+    """Sends reads of GET requests to a replica, everything else to the primary.
+
+    One replica is picked per request, so a page never mixes snapshots from
+    two replicas. Flushes always go to the primary, and a request that has
+    flushed reads from the primary from then on.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            keys = replica_keys(self._db.engines)
+            if keys and reads_from_replica():
+                if 'replica_key' not in g:
+                    g.replica_key = random.choice(keys)
+                return self._db.engines[g.replica_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def mark_write(db_session, flush_context):
+    if has_request_context():
+        g.wrote_to_primary = True
+
+
+def pin_to_primary(response):
+    """after_request hook: keep a client on the primary after it wrote."""
+    if g.get('wrote_to_primary') and current_app.config.get('REPLICA_DATABASE_URLS'):
+        response.set_cookie(PRIMARY_COOKIE, '1', httponly=True, samesite='Lax',
+                            max_age=current_app.config['READ_YOUR_WRITES_SECONDS'])
+    return response
@@ -0,0 +1,96 @@
+from sqlalchemy import func, or_, true
+from models import db
+from enums import Genres
+
+# ---------------------------------------------------------------------------- #
+# Search.
+# ---------------------------------------------------------------------------- #
+
+# enum values are one-element tuples
+GENRE_NAMES = [genre.value[0] for genre in Genres]
+
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def matching_genres(term):
+    term = term.lower()
+    return [genre for genre in GENRE_NAMES if term in genre.lower()]
+
+
+def search(model, term, page=1, per_page=20, count_cap=1000):
+    """Ranked, paginated search over name, city and genres.
+
+    Name and city substring matches are served by the trigram GIN indexes,
+    genre matches by the GIN index on the genres array. Results are ordered
+    by trigram similarity to the name, then the city. The total is counted
+    up to count_cap so a vague term cannot turn into a full count.
+    """
+    term = term.strip()
+    pattern = '%{}%'.format(escape_like(term))
+    conditions = [model.name.ilike(pattern), model.city.ilike(pattern)]
+    genres = matching_genres(term) if term else []
+    if genres:
+        conditions.append(model.genres.overlap(genres))
+
+    matches = db.session.query(model.id).filter(or_(*conditions))
+    count = db.session.query(func.count()).select_from(
+        matches.limit(count_cap).subquery()).scalar()
+
+    rank = func.greatest(func.similarity(model.name, term),
+                         func.similarity(model.city, term) * 0.5)
+    rows = db.session.query(model.id, model.name).filter(
+        or_(*conditions)).order_by(rank.desc(), model.name, model.id).limit(
+        per_page).offset((page - 1) * per_page).all()
+
+    return {
+        "count": count,
+        "count_capped": count >= count_cap,
+        "data": [{'id': row.id, 'name': row.name} for row in rows],
+        "page": page,
+        "has_prev": page > 1,
+        "has_next": page * per_page < count
+    }
+
+
+def autocomplete(model, prefix, limit=10):
+    # lower(name) LIKE 'prefix%' is a range scan on the text_pattern_ops index
+    pattern = '{}%'.format(escape_like(prefix.strip().lower()))
+    rows = db.session.query(model.id, model.name).filter(
+        func.lower(model.name).like(pattern)).order_by(
+        func.lower(model.name)).limit(limit).all()
+    return [{'id': row.id, 'name': row.name} for row in rows]
+
+
+# ---------------------------------------------------------------------------- #
+# Genre facets.
+# ---------------------------------------------------------------------------- #
+
+GENRE_MATCHES = ('any', 'all')
+
+
+def requested_genres(args):
+    """Known genres from ?genre= (repeatable) and the ?match= mode."""
+    genres = [genre for genre in args.getlist('genre') if genre in GENRE_NAMES]
+    match = args.get('match', 'any')
+    return list(dict.fromkeys(genres)), match if match in GENRE_MATCHES else 'any'
+
+
+def genre_filter(model, genres, match='any'):
+    # && and @> on the array are both served by the GIN index on genres
+    if match == 'all':
+        return model.genres.contains(genres)
+    return model.genres.overlap(genres)
+
+
+def genre_facets(model):
+    """[(genre, count)] for every Genres value, in enum order.
+
+    One aggregate over unnest(genres); cheap enough to compute once per
+    cache generation, which is how the listing views use it.
+    """
+    genre = func.unnest(model.genres).table_valued('genre').render_derived()
+    counts = dict(db.session.query(genre.c.genre, func.count()).select_from(model).join(
+        genre, true()).group_by(genre.c.genre).all())
+    return [(name, counts.get(name, 0)) for name in GENRE_NAMES]
@@ -0,0 +1,131 @@
+import json
+import dateutil.parser
+from models import db, Venue, Artist, Show
+from counters import recount_show_counters
+from areas import sync_areas
+
+# ---------------------------------------------------------------------------- #
+# Seed data loader.
+# ---------------------------------------------------------------------------- #
+
+SEED_BATCH_SIZE = 1000
+
+# load order matters: shows reference venues and artists by id
+SEED_MODELS = (
+    ('venue', 'venues', Venue),
+    ('artist', 'artists', Artist),
+    ('show', 'shows', Show),
+)
+
+
+def table_is_empty(model):
+    # SELECT EXISTS(SELECT 1 ...) stops at the first row instead of loading the table
+    return not db.session.query(model.query.exists()).scalar()
+
+
+def seed_columns(model):
+    # database-generated columns (ids, timestamps) are left to the server
+    return [column.name for column in model.__table__.columns
+            if not column.primary_key and column.server_default is None]
+
+
+def seed_value(column, value):
+    # JSON carries timestamps as ISO-8601 strings
+    if isinstance(value, str) and isinstance(column.type, db.DateTime):
+        return dateutil.parser.parse(value)
+    return value
+
+
+def insert_batch(model, columns, records):
+    table_columns = model.__table__.columns
+    rows = [{column: seed_value(table_columns[column], record.get(column))
+             for column in columns}
+            for record in records]
+    db.session.execute(model.__table__.insert(), rows)
+
+
+def default_seed_data():
+    from defaultData import artists_default_data, shows_default_data, venues_default_data
+    return {
+        'venues': venues_default_data,
+        'artists': artists_default_data,
+        'shows': shows_default_data,
+    }
+
+
+def read_seed_records(path):
+    """Yield (table, record) pairs from a JSON or JSONL seed file.
+
+    A JSON file holds an object with 'venues', 'artists' and 'shows' lists.
+    A JSONL file holds one record per line, each tagged with a 'type' of
+    'venue', 'artist' or 'show'.
+    """
+    with open(path) as seed_file:
+        if path.endswith('.jsonl'):
+            for line in seed_file:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.pop('type'), record
+        else:
+            data = json.load(seed_file)
+            for table, key, model in SEED_MODELS:
+                for record in data.get(key, []):
+                    yield table, record
+
+
+def seed(path=None, batch_size=SEED_BATCH_SIZE, log=print):
+    if path:
+        records = read_seed_records(path)
+    else:
+        data = default_seed_data()
+        records = ((table, record)
+                   for table, key, model in SEED_MODELS
+                   for record in data[key])
+
+    models = {table: model for table, key, model in SEED_MODELS}
+    columns = {table: seed_columns(model) for table, model in models.items()}
+    # only load data into tables that are still empty
+    enabled = {table: table_is_empty(model) for table, model in models.items()}
+    for table, enabled_flag in enabled.items():
+        if not enabled_flag:
+            log('Skipping {}: table already has data'.format(table))
+
+    pending = {table: [] for table in models}
+    inserted = {table: 0 for table in models}
+
+    def flush(table):
+        if pending[table]:
+            insert_batch(models[table], columns[table], pending[table])
+            inserted[table] += len(pending[table])
+            pending[table] = []
+
+    try:
+        for table, record in records:
+            if not enabled.get(table):
+                continue
+            pending[table].append(record)
+            if len(pending[table]) >= batch_size:
+                if table == 'show':
+                    # make sure every venue/artist a show may reference is in
+                    flush('venue')
+                    flush('artist')
+                flush(table)
+        for table, key, model in SEED_MODELS:
+            flush(table)
+        if inserted['show']:
+            # bulk inserts bypass the ORM events that maintain show counters
+            recount_show_counters()
+        if inserted['venue'] or inserted['artist']:
+            # and the ones that assign areas
+            sync_areas()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.close()
+
+    for table, key, model in SEED_MODELS:
+        if enabled[table]:
+            log('Seeded {} {}'.format(inserted[table], key))
+    return inserted
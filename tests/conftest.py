@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+# set before config.py is read; the app only ever sees the test database
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+if os.environ.get('TEST_DATABASE_URL'):
+    os.environ['DATABASE_URL'] = os.environ['TEST_DATABASE_URL']
+
+from query_budget import query_counter, assert_query_budget  # noqa: E402,F401
+
+# (venues, artists, shows); budgets must hold at both sizes
+CATALOG_SIZES = {
+    'small': (10, 40, 400),
+    'large': (100, 400, 8000),
+}
+
+
+@pytest.fixture(scope='session')
+def app():
+    """The app on a freshly migrated TEST_DATABASE_URL, which is wiped first."""
+    if not os.environ.get('TEST_DATABASE_URL'):
+        pytest.skip('TEST_DATABASE_URL is not set')
+    from flask_migrate import upgrade
+    from app import app
+    from models import db
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.session.execute(db.text('DROP SCHEMA public CASCADE'))
+        db.session.execute(db.text('CREATE SCHEMA public'))
+        db.session.commit()
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture(scope='module', params=sorted(CATALOG_SIZES))
+def catalog(request, app):
+    """A synthetic catalog from generate_data.py, at each of CATALOG_SIZES."""
+    from generate_data import generate
+    with app.app_context():
+        generate(*CATALOG_SIZES[request.param], truncate=True)
+    return request.param
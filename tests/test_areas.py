@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import literal, select
+
+from areas import city_key, city_key_sql, city_name
+from models import db, Venue, Area
+
+CITIES = [
+    'San Francisco',
+    '  san   FRANCISCO ',
+    '\tSan\nFrancisco\r\n',
+    'New\u00a0York',
+    'Winston-Salem',
+    ' \t ',
+    '',
+]
+
+
+@pytest.mark.parametrize('city, key', [
+    ('San Francisco', 'san francisco'),
+    ('  san   FRANCISCO ', 'san francisco'),
+    ('\tSan\nFrancisco\r\n', 'san francisco'),
+    (' \t ', ''),
+])
+def test_city_key(city, key):
+    assert city_key(city) == key
+
+
+def test_city_name_keeps_spelling():
+    assert city_name('  New   York ') == 'New York'
+
+
+def test_city_key_matches_sql(app):
+    with app.app_context():
+        keys = db.session.execute(select(*[
+            city_key_sql(literal(city)) for city in CITIES])).one()
+    assert list(keys) == [city_key(city) for city in CITIES]
+
+
+def area_of(state, city):
+    return Area.query.filter_by(state=state, city_key=city.lower()).first()
+
+
+def test_deleting_a_venue_decrements_its_area(app):
+    with app.app_context():
+        venues = [Venue(name='Area Test {}'.format(index), city='Testville', state='ZZ',
+                        genres=['Jazz'])
+                  for index in range(2)]
+        db.session.add_all(venues)
+        db.session.commit()
+        venue_id = venues[0].id
+        assert area_of('ZZ', 'Testville').venue_count == 2
+
+    response = app.test_client().get('/venues/{}/delete'.format(venue_id))
+    assert response.status_code == 302
+
+    with app.app_context():
+        assert db.session.get(Venue, venue_id) is None
+        assert area_of('ZZ', 'Testville').venue_count == 1
+        Venue.query.filter(Venue.state == 'ZZ').delete()
+        Area.query.filter(Area.state == 'ZZ').delete()
+        db.session.commit()
+
+
+@pytest.mark.parametrize('per_page', ['-1', '0', '100000'])
+def test_out_of_range_page_sizes_are_clamped(app, per_page):
+    response = app.test_client().get('/venues?per_page=' + per_page)
+    assert response.status_code == 200
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from bookings import busy_and_free
+
+DAY = datetime(2035, 4, 1, tzinfo=pytz.UTC)
+
+
+def at(hour):
+    return DAY + timedelta(hours=hour)
+
+
+def span(low, high):
+    return at(low), at(high)
+
+
+def test_empty_window_is_all_free():
+    assert busy_and_free([], at(0), at(24)) == ([], [span(0, 24)])
+
+
+def test_gaps_between_bookings_are_free():
+    busy, free = busy_and_free([span(10, 12), span(18, 20)], at(0), at(24))
+    assert busy == [span(10, 12), span(18, 20)]
+    assert free == [span(0, 10), span(12, 18), span(20, 24)]
+
+
+def test_overlapping_and_touching_bookings_merge():
+    bookings = [span(10, 13), span(11, 12), span(12, 14), span(14, 15), span(16, 17)]
+    busy, free = busy_and_free(bookings, at(0), at(24))
+    assert busy == [span(10, 15), span(16, 17)]
+    assert free == [span(0, 10), span(15, 16), span(17, 24)]
+
+
+def test_bookings_are_clipped_to_the_window():
+    # shows that started before the window or end after it
+    busy, free = busy_and_free([span(-2, 1), span(22, 26)], at(0), at(24))
+    assert busy == [span(0, 1), span(22, 24)]
+    assert free == [span(1, 22)]
+
+
+def test_fully_booked_window_has_no_free_time():
+    assert busy_and_free([span(-1, 25)], at(0), at(24)) == ([span(0, 24)], [])
+
+
+def test_short_gaps_are_dropped():
+    bookings = [span(10, 12), span(13, 15)]
+    busy, free = busy_and_free(bookings, at(0), at(24), min_duration=timedelta(hours=2))
+    assert free == [span(0, 10), span(15, 24)]
+    # a gap exactly min_duration long still counts
+    busy, free = busy_and_free(bookings, at(9), at(17), min_duration=timedelta(hours=2))
+    assert free == [span(15, 17)]
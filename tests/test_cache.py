@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from cache import InProcessBackend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_get_returns_what_was_set(clock):
+    backend = InProcessBackend()
+    backend.set('page:/venues', b'body', ttl=60)
+    assert backend.get('page:/venues') == b'body'
+    assert backend.get('page:/artists') is None
+
+
+def test_entries_expire_after_their_ttl(clock):
+    backend = InProcessBackend()
+    backend.set('short', 1, ttl=10)
+    backend.set('long', 2, ttl=100)
+    clock[0] += 10.5
+    assert backend.get('short') is None
+    assert backend.get('long') == 2
+    # expired entries are dropped, not just hidden
+    assert 'short' not in backend.entries
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    backend = InProcessBackend(max_entries=2)
+    backend.set('a', 1, ttl=60)
+    backend.set('b', 2, ttl=60)
+    backend.get('a')
+    backend.set('c', 3, ttl=60)
+    assert backend.get('b') is None
+    assert backend.get('a') == 1
+    assert backend.get('c') == 3
+
+
+def test_tag_versions_are_never_evicted(clock):
+    backend = InProcessBackend(max_entries=1)
+    backend.add('tag:venues', 5)
+    backend.add('tag:venues', 9)
+    for index in range(3):
+        backend.set('page:{}'.format(index), index, ttl=60)
+    clock[0] += 3600
+    assert backend.get('tag:venues') == 5
+    backend.incr('tag:venues')
+    assert backend.get('tag:venues') == 6
+
+
+def test_get_many_keeps_key_order(clock):
+    backend = InProcessBackend()
+    backend.set('a', 1, ttl=60)
+    backend.add('tag:b', 2)
+    assert backend.get_many(['tag:b', 'missing', 'a']) == [2, None, 1]
@@ -0,0 +1,120 @@
+import gzip
+import zlib
+
+import pytest
+from flask import Flask, Response
+
+import compression
+from compression import Compression, gzip_chunks
+
+PAGE = 'x' * 2000
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    Compression(app)
+
+    @app.route('/page')
+    def page():
+        return PAGE
+
+    @app.route('/small')
+    def small():
+        return 'tiny'
+
+    @app.route('/tagged')
+    def tagged():
+        response = Response(PAGE)
+        response.set_etag('abc')
+        return response
+
+    @app.route('/stream')
+    def stream():
+        return Response((chunk for chunk in ('<p>', PAGE, '</p>')), mimetype='text/html')
+
+    return app
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    # only encoding selection is exercised, never the compressor itself
+    monkeypatch.setattr(compression, 'brotli', object())
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=0', None),
+    ('identity', None),
+    ('', None),
+    ('br', None),
+])
+def test_choose_encoding(app, header, expected):
+    with app.test_request_context(headers={'Accept-Encoding': header}):
+        assert app.extensions['compression'].choose_encoding() == expected
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, br', 'br'),
+    ('gzip;q=1.0, br;q=0.5', 'gzip'),
+    ('br;q=0, gzip;q=0.1', 'gzip'),
+    ('*', 'br'),
+])
+def test_choose_encoding_with_brotli(app, with_brotli, header, expected):
+    with app.test_request_context(headers={'Accept-Encoding': header}):
+        assert app.extensions['compression'].choose_encoding() == expected
+
+
+def test_buffered_response_is_gzipped(app):
+    response = app.test_client().get('/page', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.get_data()).decode() == PAGE
+
+
+def test_small_and_unaccepted_responses_are_left_alone(app):
+    client = app.test_client()
+    assert 'Content-Encoding' not in client.get(
+        '/small', headers={'Accept-Encoding': 'gzip'}).headers
+    response = client.get('/page')
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True) == PAGE
+
+
+def test_compressed_etag_gets_a_variant(app):
+    client = app.test_client()
+    response = client.get('/tagged', headers={'Accept-Encoding': 'gzip'})
+    assert response.get_etag() == ('abc-gzip', False)
+    assert client.get('/tagged').get_etag() == ('abc', False)
+
+
+def test_streamed_response_is_gzipped_chunk_by_chunk(app):
+    response = app.test_client().get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.get_data()).decode() == '<p>' + PAGE + '</p>'
+
+
+def test_gzip_chunks_flush_every_chunk():
+    # each input chunk is decodable as soon as its output is yielded
+    decompressor = zlib.decompressobj(31)
+    chunks = ['first ', 'second ', b'third']
+    output = gzip_chunks(iter(chunks), 6)
+    for chunk in chunks:
+        expected = chunk.encode() if isinstance(chunk, str) else chunk
+        assert decompressor.decompress(next(output)) == expected
+    decompressor.decompress(b''.join(output))
+    assert decompressor.eof
+
+
+def test_gzip_chunks_close_the_source():
+    closed = []
+
+    def source():
+        try:
+            yield 'chunk'
+        finally:
+            closed.append(True)
+
+    list(gzip_chunks(source(), 6))
+    assert closed == [True]
@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'EXPORT_TOKEN', 'export-test')
+    return app.test_client()
+
+
+@pytest.mark.parametrize('since', ['not-a-date', '99999999999999999999'])
+def test_invalid_since_is_a_bad_request(client, since):
+    response = client.get('/export/venue.ndjson', query_string={'since': since},
+                          headers={'Authorization': 'Bearer export-test'})
+    assert response.status_code == 400
+
+
+def test_valid_since_streams_the_export(client):
+    response = client.get('/export/venue.ndjson', query_string={'since': '2035-01-01'},
+                          headers={'Authorization': 'Bearer export-test'})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == ''
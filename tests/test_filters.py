@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import babel.dates
+import dateutil.parser
+import pytest
+import pytz
+
+from filters import DATETIME_FORMATS, format_datetime
+
+VALUES = [
+    '2035-04-01T20:00:00+00:00',
+    '2035-04-01T20:00:00+02:00',
+    '2019-06-15T23:00:00.000Z',
+]
+
+
+@pytest.fixture(autouse=True)
+def cold_memo():
+    format_datetime.cache_clear()
+
+
+@pytest.mark.parametrize('value', VALUES)
+@pytest.mark.parametrize('format', sorted(DATETIME_FORMATS) + ['yyyy-MM-dd HH:mm'])
+def test_matches_babel(value, format):
+    # the compiled pattern must render exactly what babel renders
+    expected = babel.dates.format_datetime(
+        dateutil.parser.parse(value), DATETIME_FORMATS.get(format, format))
+    assert format_datetime(value, format) == expected
+
+
+def test_full_format():
+    assert format_datetime('2035-04-01T20:00:00Z', 'full') == 'Sunday April, 1, 2035 at 8:00PM'
+
+
+def test_datetimes_and_iso_strings_agree():
+    value = datetime(2035, 4, 1, 20, tzinfo=pytz.UTC)
+    assert format_datetime(value) == format_datetime(value.isoformat())
+
+
+def test_naive_values_are_utc():
+    assert format_datetime('2035-04-01T20:00:00') == format_datetime('2035-04-01T20:00:00Z')
+    assert (format_datetime(datetime(2035, 4, 1, 20))
+            == format_datetime(datetime(2035, 4, 1, 20, tzinfo=pytz.UTC)))
+
+
+def test_repeated_values_are_memoized():
+    for _ in range(3):
+        format_datetime('2035-04-01T20:00:00Z', 'full')
+    info = format_datetime.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
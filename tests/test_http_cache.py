@@ -0,0 +1,61 @@
+import pytest
+from flask import Flask
+
+from cache import Cache
+from http_cache import artists_stamp, conditional, venues_stamp
+from models import db, Venue
+
+
+@pytest.fixture
+def page():
+    """A cached, conditional view whose stamp and body the test controls."""
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', CACHE_BACKEND='memory')
+    page_cache = Cache(app)
+    state = {'stamp': 'one', 'body': 'first'}
+
+    @app.route('/page')
+    @conditional(lambda: (state['stamp'], None))
+    @page_cache.cached_page('page')
+    def view():
+        return state['body']
+
+    return app.test_client(), state
+
+
+def test_unchanged_stamp_serves_the_cached_body(page):
+    client, state = page
+    assert client.get('/page').get_data(as_text=True) == 'first'
+    state['body'] = 'second'
+    assert client.get('/page').get_data(as_text=True) == 'first'
+
+
+def test_new_stamp_bypasses_the_cached_body(page):
+    # e.g. a show moving from upcoming to past: the stamp changes, no tag is bumped
+    client, state = page
+    first = client.get('/page')
+    state.update(stamp='two', body='second')
+    second = client.get('/page')
+    assert second.get_data(as_text=True) == 'second'
+    assert second.get_etag() != first.get_etag()
+
+
+def test_matching_etag_is_not_modified(page):
+    client, state = page
+    etag, weak = client.get('/page').get_etag()
+    assert client.get('/page', headers={'If-None-Match': '"{}"'.format(etag)}).status_code == 304
+
+
+def test_deletes_change_the_listing_stamps(app):
+    with app.app_context():
+        venue = Venue(name='Stamp Test', city='Testville', state='ZZ', genres=['Jazz'])
+        db.session.add(venue)
+        db.session.commit()
+        before = venues_stamp(), artists_stamp()
+        db.session.delete(venue)
+        db.session.commit()
+        venue_etag, last_modified = venues_stamp()
+        assert venue_etag != before[0][0]
+        assert last_modified > before[0][1]
+        # only the table rows were deleted from changes its stamp
+        assert artists_stamp() == before[1]
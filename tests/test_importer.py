@@ -0,0 +1,72 @@
+import io
+import json
+import random
+
+import pytest
+
+from generate_data import venue_rows
+from importer import import_catalog, read_rows
+from models import db, Venue
+
+
+@pytest.fixture
+def venues(app):
+    rows = []
+    for index, row in enumerate(venue_rows(random.Random(7), 5)):
+        row['external_id'] = 'import-test-{}'.format(index)
+        rows.append(row)
+    yield rows
+    with app.app_context():
+        Venue.query.filter(Venue.external_id.like('import-test-%')).delete(
+            synchronize_session=False)
+        db.session.commit()
+
+
+def test_duplicate_external_ids_are_rejected_rows(app, venues):
+    rejected = []
+    with app.app_context():
+        import_catalog('venue', enumerate(venues[:2], start=1))
+        # two already imported, one repeated within the file, across batches
+        rows = venues + [dict(venues[4], name='Repeat Hall')]
+        report = import_catalog('venue', enumerate(rows, start=1), batch_size=2,
+                                on_reject=lambda line, row, errors: rejected.append((line, errors)))
+        assert report.as_dict() == {'read': 6, 'inserted': 3, 'rejected': 3}
+        assert [line for line, errors in rejected] == [1, 2, 6]
+        assert all('external_id' in errors for line, errors in rejected)
+        assert Venue.query.filter(Venue.external_id.like('import-test-%')).count() == 5
+
+
+@pytest.fixture
+def anonymous_venues(app):
+    rows = []
+    for index, row in enumerate(venue_rows(random.Random(8), 3)):
+        del row['seeking_talent']
+        row['name'] = 'Import Test {}'.format(index)
+        rows.append(row)
+    yield rows
+    with app.app_context():
+        Venue.query.filter(Venue.name.like('Import Test %')).delete(synchronize_session=False)
+        db.session.commit()
+
+
+@pytest.mark.parametrize('method', ['copy', 'insert'])
+def test_missing_fields_are_stored_as_null(app, anonymous_venues, method):
+    with app.app_context():
+        report = import_catalog('venue', enumerate(anonymous_venues, start=1), method=method)
+        assert report.as_dict() == {'read': 3, 'inserted': 3, 'rejected': 0}
+        venues = Venue.query.filter(Venue.name.like('Import Test %')).all()
+        assert [(venue.external_id, venue.seeking_talent) for venue in venues] == [(None, None)] * 3
+        # an empty string stays an empty string
+        assert all(venue.seeking_description == '' for venue in venues)
+
+
+def test_unreadable_lines_are_rejected_rows(app, venues):
+    rejected = []
+    lines = [json.dumps(venues[0]), '{"name": "Broken', '', '["not", "a", "row"]',
+             json.dumps(venues[1])]
+    stream = io.StringIO('\n'.join(lines) + '\n')
+    with app.app_context():
+        report = import_catalog('venue', read_rows(stream, 'jsonl'), batch_size=1,
+                                on_reject=lambda line, row, errors: rejected.append((line, row)))
+        assert report.as_dict() == {'read': 4, 'inserted': 2, 'rejected': 2}
+        assert rejected == [(2, '{"name": "Broken'), (4, '["not", "a", "row"]')]
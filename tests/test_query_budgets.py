@@ -0,0 +1,28 @@
+import pytest
+
+from query_budget import ROUTE_BUDGETS, budget_paths
+
+
+@pytest.fixture(scope='module')
+def paths(app, catalog):
+    with app.app_context():
+        return {route: path for route, path, budget in budget_paths()}
+
+
+@pytest.mark.parametrize('route', sorted(ROUTE_BUDGETS))
+def test_route_stays_within_budget(paths, assert_query_budget, route):
+    # the same budget at every catalog size: counts must not grow with the data
+    response = assert_query_budget(paths[route], ROUTE_BUDGETS[route])
+    assert response.status_code == 200
+
+
+def test_genre_filter_stays_within_budget(catalog, assert_query_budget):
+    response = assert_query_budget('/venues?genre=Jazz&genre=Folk', ROUTE_BUDGETS['/venues'])
+    assert response.status_code == 200
+
+
+def test_counter_sees_every_statement(query_counter):
+    from models import db
+    db.session.execute(db.text('SELECT 1'))
+    db.session.execute(db.text('SELECT 2'))
+    assert query_counter.count == 2